@@ -0,0 +1,215 @@
+import argparse
+import json
+import multiprocessing
+import random
+
+from array import array
+from collections import deque
+
+import snapshot
+
+# Number of BFS sources advanced together, one bit each
+BATCH_SIZE = 64
+
+# Graph analysed by worker processes, inherited when they are forked
+_graph = None
+
+
+def bit_parallel_bfs(graph, sources):
+    """
+    Runs a BFS over the co-star graph from every person index in `sources`
+    at once.
+
+    Each person carries an integer bitmask with bit i set once source i has
+    reached them, so one sweep over the frontier advances every search.
+    Returns, for each source, a list whose element d is the number of people
+    at distance d.
+    """
+    visited = [0] * len(graph.person_ids)
+    frontier = {}
+    for i, s in enumerate(sources):
+        visited[s] |= 1 << i
+        frontier[s] = frontier.get(s, 0) | (1 << i)
+
+    levels = [[1] for _ in sources]
+    while frontier:
+        # Bits are only new if the source had not reached the person before
+        reached = {}
+        for p, bits in frontier.items():
+            for q in graph.costars_of(p)[0]:
+                new = bits & ~visited[q]
+                if new:
+                    reached[q] = reached.get(q, 0) | new
+
+        counts = [0] * len(sources)
+        for q, bits in reached.items():
+            visited[q] |= bits
+            while bits:
+                lowest = bits & -bits
+                counts[lowest.bit_length() - 1] += 1
+                bits ^= lowest
+
+        for i, count in enumerate(counts):
+            if count:
+                levels[i].append(count)
+        frontier = reached
+
+    return levels
+
+
+def betweenness_from(graph, s):
+    """
+    Returns a dict of each person index's dependency on shortest paths from
+    person index `s` (one term of Brandes' betweenness algorithm).
+    """
+    n = len(graph.person_ids)
+    distance = array("i", [-1]) * n
+    paths = [0] * n
+    predecessors = {}
+    order = []
+
+    distance[s] = 0
+    paths[s] = 1
+    frontier = deque([s])
+    while frontier:
+        p = frontier.popleft()
+        order.append(p)
+        for q in graph.costars_of(p)[0]:
+            if distance[q] == -1:
+                distance[q] = distance[p] + 1
+                frontier.append(q)
+            if distance[q] == distance[p] + 1:
+                paths[q] += paths[p]
+                predecessors.setdefault(q, []).append(p)
+
+    # Accumulate dependencies in order of decreasing distance
+    dependency = {}
+    for q in reversed(order):
+        for p in predecessors.get(q, ()):
+            share = paths[p] / paths[q] * (1 + dependency.get(q, 0))
+            dependency[p] = dependency.get(p, 0) + share
+    dependency.pop(s, None)
+    return dependency
+
+
+def _levels_task(sources):
+    return sources, bit_parallel_bfs(_graph, sources)
+
+
+def _betweenness_task(sources):
+    total = {}
+    for s in sources:
+        for p, value in betweenness_from(_graph, s).items():
+            total[p] = total.get(p, 0) + value
+    return total
+
+
+def _map(task, batches, workers):
+    """
+    Runs `task` over `batches`, across a forked process pool if `workers`
+    is more than one and forking is available.
+    """
+    if workers <= 1 or "fork" not in multiprocessing.get_all_start_methods():
+        return map(task, batches)
+    pool = multiprocessing.get_context("fork").Pool(workers)
+    try:
+        return list(pool.imap_unordered(task, batches))
+    finally:
+        pool.close()
+        pool.join()
+
+
+def analyse(graph, sample=None, betweenness_sample=0, workers=1, seed=None):
+    """
+    Returns a dictionary of graph-wide statistics over the co-star graph:
+    the distribution of distances between connected people, the average
+    degrees of separation, and each source person's eccentricity and
+    closeness. With `betweenness_sample` above zero, approximate betweenness
+    is estimated from that many random sources.
+
+    Sources are every person, or `sample` random people, searched in
+    bit-parallel batches of BATCH_SIZE, spread over `workers` processes.
+    """
+    global _graph
+
+    _graph = graph
+    rng = random.Random(seed)
+    n = len(graph.person_ids)
+    sources = list(range(n))
+    if sample is not None and sample < n:
+        sources = rng.sample(sources, sample)
+
+    batches = [sources[i : i + BATCH_SIZE] for i in range(0, len(sources), BATCH_SIZE)]
+
+    histogram = {}
+    eccentricity = {}
+    closeness = {}
+    for batch, levels in _map(_levels_task, batches, workers):
+        for s, counts in zip(batch, levels):
+            person_id = graph.person_ids[s]
+            eccentricity[person_id] = len(counts) - 1
+            total = 0
+            for distance, count in enumerate(counts[1:], start=1):
+                histogram[distance] = histogram.get(distance, 0) + count
+                total += distance * count
+            reached = sum(counts) - 1
+            closeness[person_id] = reached / total if total else 0.0
+
+    pairs = sum(histogram.values())
+    report = {
+        "people": n,
+        "sources": len(sources),
+        "distance_histogram": dict(sorted(histogram.items())),
+        "average_separation": (
+            sum(d * count for d, count in histogram.items()) / pairs if pairs else None
+        ),
+        "eccentricity": eccentricity,
+        "closeness": closeness,
+    }
+
+    if betweenness_sample > 0:
+        picked = rng.sample(range(n), min(betweenness_sample, n))
+        chunks = [picked[i::max(workers, 1)] for i in range(max(workers, 1))]
+        scores = {}
+        for partial in _map(_betweenness_task, [c for c in chunks if c], workers):
+            for p, value in partial.items():
+                scores[p] = scores.get(p, 0) + value
+
+        # Scale the sampled sum up to an estimate over all sources, halved
+        # because every unordered pair is seen from both ends
+        scale = n / len(picked) / 2
+        report["betweenness"] = {
+            graph.person_ids[p]: value * scale for p, value in scores.items()
+        }
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyse the co-star graph.")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--sample", type=int, help="number of random BFS sources")
+    parser.add_argument(
+        "--betweenness",
+        type=int,
+        default=0,
+        metavar="N",
+        help="estimate betweenness from N random sources",
+    )
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    graph = snapshot.load_or_build(args.directory, adjacency=True)
+    report = analyse(
+        graph,
+        sample=args.sample,
+        betweenness_sample=args.betweenness,
+        workers=args.workers,
+        seed=args.seed,
+    )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
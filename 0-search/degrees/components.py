@@ -0,0 +1,166 @@
+class ComponentIndex():
+    """
+    Union-find over people, where everyone who starred in the same movie is
+    in the same connected component.
+    """
+
+    def __init__(self, person_ids, casts):
+        """
+        Builds the index from every person id and an iterable of casts, each
+        an iterable of the person ids who starred in one movie.
+        """
+        # Union-find over elements. A person's element is their id, unless
+        # they were split off, which gives them a fresh one
+        self.parent = {}
+        self.size = {}
+        self.element = {}
+        self.people = 0
+        for person_id in person_ids:
+            self.add(person_id)
+        for cast in casts:
+            first = None
+            for person_id in cast:
+                if first is None:
+                    first = person_id
+                else:
+                    self.union(first, person_id)
+
+    def add(self, person_id):
+        """
+        Adds a person as their own component, if not already present.
+        """
+        if person_id not in self.parent:
+            self.parent[person_id] = person_id
+            self.size[person_id] = 1
+            self.people += 1
+
+    def find(self, person_id):
+        """
+        Returns the representative element of a person's component.
+        """
+        parent = self.parent
+        person_id = self.element.get(person_id, person_id)
+        while parent[person_id] != person_id:
+            # Path halving keeps later lookups close to O(1)
+            parent[person_id] = parent[parent[person_id]]
+            person_id = parent[person_id]
+        return person_id
+
+    def union(self, a, b):
+        """
+        Merges the components of two people.
+        """
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size.pop(b)
+
+    def split(self, person_ids, neighbors):
+        """
+        Updates the components after edges were removed. `person_ids` must
+        include, for every removed edge, a person on each side of it: the
+        person who left a movie and someone still in its cast.
+        `neighbors(person_id)` must return the person ids who currently share
+        a movie with a person.
+
+        Each person is checked against a representative of their component,
+        searching from both ends a level of the smaller frontier at a time
+        until the sides meet. If one side runs out first, it is a component
+        of its own and only its people are relabelled, so the rest of a large
+        component is never visited.
+        """
+        representatives = {}
+        for person_id in person_ids:
+            root = self.find(person_id)
+            other_id = representatives.setdefault(root, person_id)
+            if other_id == person_id:
+                continue
+            side = self._separated(other_id, person_id, neighbors)
+            if side is None:
+                continue
+            self._relabel(side)
+            representatives[root] = person_id if other_id in side else other_id
+            for member_id in (other_id, person_id):
+                representatives.setdefault(self.find(member_id), member_id)
+
+    def _separated(self, a, b, neighbors):
+        """
+        Returns every person connected to one of `a` and `b` but not the
+        other, on whichever side is exhausted first, or None if they are
+        still connected.
+        """
+        seen = [{a}, {b}]
+        frontiers = [[a], [b]]
+        while True:
+            # The smaller frontier, or the side seen less of on a tie
+            sides = [(len(frontiers[i]), len(seen[i])) for i in (0, 1)]
+            side = 0 if sides[0] <= sides[1] else 1
+            next_frontier = []
+            for person_id in frontiers[side]:
+                for neighbor_id in neighbors(person_id):
+                    if neighbor_id in seen[1 - side]:
+                        return None
+                    if neighbor_id not in seen[side]:
+                        seen[side].add(neighbor_id)
+                        next_frontier.append(neighbor_id)
+            if not next_frontier:
+                return seen[side]
+            frontiers[side] = next_frontier
+
+    def _relabel(self, people):
+        """
+        Moves `people`, all of one current component, into a new component of
+        their own. Their old elements stay behind, as others may still reach
+        their root through them.
+        """
+        for person_id in people:
+            root = self.find(person_id)
+            self.size[root] -= 1
+            if not self.size[root]:
+                del self.size[root]
+
+        root = None
+        for person_id in people:
+            element = object()
+            self.element[person_id] = element
+            if root is None:
+                root = element
+            self.parent[element] = root
+        self.size[root] = len(people)
+
+    def connected(self, a, b):
+        """
+        Returns True if two people are in the same component.
+        """
+        return self.find(a) == self.find(b)
+
+    def component_size(self, person_id):
+        """
+        Returns the number of people in a person's component.
+        """
+        return self.size[self.find(person_id)]
+
+    def sizes(self):
+        """
+        Returns the size of every component, largest first.
+        """
+        return sorted(self.size.values(), reverse=True)
+
+    def statistics(self):
+        """
+        Returns a dictionary of summary statistics about the components.
+        """
+        sizes = self.sizes()
+        histogram = {}
+        for size in sizes:
+            histogram[size] = histogram.get(size, 0) + 1
+        return {
+            "people": self.people,
+            "components": len(sizes),
+            "largest": sizes[0] if sizes else 0,
+            "singletons": histogram.get(1, 0),
+            "histogram": histogram,
+        }
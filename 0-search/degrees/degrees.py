@@ -1,9 +1,23 @@
+import argparse
 import csv
+import heapq
+import itertools
+import json
+import multiprocessing
+import os
 import sys
-
+import time
+
+import snapshot
+from components import ComponentIndex
+from graph import CompactGraph
+from landmarks import LandmarkOracle
+from loader import Progress, paused_gc, read_rows
+from nameindex import NameIndex, SortedNames
 from util import Node, StackFrontier, QueueFrontier
 
-# Maps names to a set of corresponding person_ids
+# Maps names to a set of corresponding person_ids; a SortedNames over the
+# snapshot's tables when the compact graph was loaded from one
 names = {}
 
 # Maps person_ids to a dictionary of: name, birth, movies (a set of movie_ids)
@@ -12,67 +26,228 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Compact integer-indexed graph, used instead of people and movies when loaded
+graph = None
+
+# Landmark distance oracle over the compact graph, if built
+oracle = None
+
+# Connected components of people, if built
+components = None
+
+# Sorted index over names for prefix and fuzzy lookups, built on first use
+name_index = None
+
+# Ways to choose between several people with the same name
+POLICIES = ("ask", "most-movies", "earliest-birth", "none")
 
-def load_data(directory):
+# Arguments of the last load_data call, so worker processes can repeat it
+loaded_from = None
+
+
+@paused_gc()
+def load_data(
+    directory, compact=False, use_snapshot=True, adjacency=False, progress=None
+):
     """
     Load data from CSV files into memory.
+
+    If `compact` is True, the star graph is loaded into a CompactGraph
+    instead of the people and movies dicts. Unless `use_snapshot` is False,
+    the compact graph is memory-mapped from a binary snapshot next to the CSV
+    files, which is (re)written whenever it is missing or stale.
+
+    If `adjacency` is True, a co-star adjacency index is precomputed as well;
+    this implies `compact`.
+
+    The CSV files are streamed in chunks; `progress`, if given, is called
+    after each one as described in loader.read_rows.
     """
+    global graph, loaded_from, name_index, components, names
+
+    loaded_from = (directory, compact, use_snapshot, adjacency)
+    name_index = None
+    components = None
+
+    if compact or adjacency:
+        if use_snapshot:
+            graph = snapshot.load_or_build(directory, adjacency=adjacency, progress=progress)
+        else:
+            graph = CompactGraph.from_csv(directory, progress=progress)
+            if adjacency:
+                graph.build_adjacency()
+        if graph.name_order is not None:
+            names = SortedNames(graph.person_names, graph.person_ids, graph.name_order)
+            return
+        for person_id, name in zip(graph.person_ids, graph.person_names):
+            names.setdefault(name.lower(), set()).add(person_id)
+        return
+
     # Load people
-    with open(f"{directory}/people.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            people[row["id"]] = {
-                "name": row["name"],
-                "birth": row["birth"],
+    for chunk in read_rows(f"{directory}/people.csv", ("id", "name", "birth"), progress):
+        for person_id, name, birth in chunk:
+            people[person_id] = {
+                "name": name,
+                "birth": birth,
                 "movies": set(),
             }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
+            if name.lower() not in names:
+                names[name.lower()] = {person_id}
             else:
-                names[row["name"].lower()].add(row["id"])
+                names[name.lower()].add(person_id)
 
     # Load movies
-    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            movies[row["id"]] = {
-                "title": row["title"],
-                "year": row["year"],
+    for chunk in read_rows(f"{directory}/movies.csv", ("id", "title", "year"), progress):
+        for movie_id, title, year in chunk:
+            movies[movie_id] = {
+                "title": title,
+                "year": year,
                 "stars": set(),
             }
 
     # Load stars
-    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
+    for chunk in read_rows(f"{directory}/stars.csv", ("person_id", "movie_id"), progress):
+        for person_id, movie_id in chunk:
             try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
+                people[person_id]["movies"].add(movie_id)
+                movies[movie_id]["stars"].add(person_id)
             except KeyError:
                 pass
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    parser = argparse.ArgumentParser(description="Find degrees of separation.")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="load the star graph into compact integer-indexed arrays",
+    )
+    parser.add_argument(
+        "--adjacency",
+        action="store_true",
+        help="precompute each person's co-stars at load time (implies --compact)",
+    )
+    parser.add_argument(
+        "--landmarks",
+        type=int,
+        default=0,
+        metavar="K",
+        help="precompute distances to K landmark people for A* search (implies --compact)",
+    )
+    parser.add_argument(
+        "--components",
+        action="store_true",
+        help="label connected components at load time and print their statistics",
+    )
+    parser.add_argument(
+        "--delta",
+        action="append",
+        default=[],
+        metavar="DIR",
+        help="apply a directory of added/removed rows after loading (repeatable)",
+    )
+    parser.add_argument(
+        "--bidirectional",
+        action="store_true",
+        help="search from both people at once",
+    )
+    parser.add_argument(
+        "--no-snapshot",
+        action="store_true",
+        help="always parse the CSV files instead of using a compact snapshot",
+    )
+    parser.add_argument(
+        "--progress",
+        action="store_true",
+        help="report loading progress and throughput on stderr",
+    )
+    parser.add_argument(
+        "--batch",
+        metavar="FILE",
+        help="answer CSV name pairs from FILE ('-' for stdin) as JSON lines",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="number of worker processes for --batch",
+    )
+    parser.add_argument(
+        "--policy",
+        choices=POLICIES,
+        help="how to choose between people with the same name "
+        "(default: ask, or none with --batch)",
+    )
+    parser.add_argument(
+        "--fuzzy",
+        type=int,
+        default=0,
+        metavar="N",
+        help="match unknown names within N edits",
+    )
+    args = parser.parse_args()
+    if args.policy is None:
+        args.policy = "none" if args.batch else "ask"
+    elif args.batch and args.policy == "ask":
+        parser.error("--policy ask cannot be used with --batch")
+
+    # Keep stdout clean for JSON lines in batch mode
+    log = sys.stderr if args.batch else sys.stdout
 
     # Load data from files into memory
-    print("Loading data...")
-    load_data(directory)
-    print("Data loaded.")
+    print("Loading data...", file=log)
+    load_data(
+        args.directory,
+        compact=args.compact or args.landmarks > 0,
+        use_snapshot=not args.no_snapshot,
+        adjacency=args.adjacency,
+        progress=Progress() if args.progress else None,
+    )
+    if args.landmarks > 0:
+        build_landmarks(args.landmarks)
+    for directory in args.delta:
+        changes = apply_delta(directory)
+        print(f"Applied {directory}: {changes}", file=log)
+    if args.components:
+        statistics = build_components().statistics()
+        print(
+            f"{statistics['people']} people in {statistics['components']} components, "
+            f"largest {statistics['largest']}, {statistics['singletons']} alone.",
+            file=log,
+        )
+    print("Data loaded.", file=log)
+
+    if args.batch:
+        options = {
+            "bidirectional": args.bidirectional,
+            "policy": args.policy,
+            "max_distance": args.fuzzy,
+        }
+        if args.batch == "-":
+            run_batch(sys.stdin, sys.stdout, args.workers, **options)
+        else:
+            with open(args.batch, encoding="utf-8", newline="") as f:
+                run_batch(f, sys.stdout, args.workers, **options)
+        return
 
     while True:
-        source = person_id_for_name(input("Name: "))
+        source = person_id_for_name(input("Name: "), args.policy, args.fuzzy)
         if source is None:
             print("Person not found.")
             continue
-        target = person_id_for_name(input("Name: "))
+        target = person_id_for_name(input("Name: "), args.policy, args.fuzzy)
         if target is None:
             print("Person not found.")
             continue
 
-        path = shortest_path(source, target)
+        if oracle is not None:
+            lower, upper = estimate_separation(source, target)
+            if lower is not None:
+                upper = "unknown" if upper is None else upper
+                print(f"Estimate: between {lower} and {upper} degrees.")
+
+        path = shortest_path(source, target, bidirectional=args.bidirectional)
 
         if path is None:
             print("Not connected.")
@@ -81,19 +256,290 @@ def main():
             print(f"{degrees} degrees of separation.")
             path = [(None, source)] + path
             for i in range(degrees):
-                person1 = people[path[i][1]]["name"]
-                person2 = people[path[i + 1][1]]["name"]
-                movie = movies[path[i + 1][0]]["title"]
+                person1 = person_info(path[i][1])["name"]
+                person2 = person_info(path[i + 1][1])["name"]
+                movie = movie_info(path[i + 1][0])["title"]
                 print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def run_batch(
+    infile, outfile, workers=1, bidirectional=False, policy="none", max_distance=0
+):
+    """
+    Answers every (source name, target name) CSV row in `infile`, writing one
+    JSON object per line to `outfile` in input order. Names are resolved
+    without prompting, using `policy` and `max_distance` as for
+    person_id_for_name.
+
+    With more than one worker, queries are spread over a process pool started
+    as worker_context describes.
+    """
+    if policy == "ask":
+        raise Exception("batch queries cannot ask which person is intended")
+
+    options = {
+        "bidirectional": bidirectional,
+        "policy": policy,
+        "max_distance": max_distance,
+    }
+    queries = (
+        (row[0], row[1], options)
+        for row in csv.reader(infile)
+        if len(row) >= 2
+    )
+
+    if workers <= 1:
+        for answer in map(answer_query, queries):
+            outfile.write(json.dumps(answer) + "\n")
+        return
+
+    context, initializer, initargs = worker_context()
+    with context.Pool(workers, initializer=initializer, initargs=initargs) as pool:
+        for answer in pool.imap(answer_query, queries, chunksize=64):
+            outfile.write(json.dumps(answer) + "\n")
+
+
+def worker_context():
+    """
+    Returns (context, initializer, initargs) for a pool of worker processes
+    that answer queries. Workers are forked where possible, so they share the
+    loaded data copy-on-write; otherwise each one reloads it.
+    """
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork"), None, ()
+    return multiprocessing.get_context(), reload_data, (loaded_from,)
+
+
+def answer_query(query):
+    """
+    Resolves a (source name, target name, options) query and returns a
+    JSON-serialisable dictionary with its path and timing.
+    """
+    source_name, target_name, options = query
+    answer = {"source": source_name, "target": target_name}
+
+    start = time.perf_counter()
+    source = person_id_for_name(source_name, options["policy"], options["max_distance"])
+    target = person_id_for_name(target_name, options["policy"], options["max_distance"])
+    if source is None or target is None:
+        answer["error"] = "Person not found or ambiguous."
+    else:
+        path = shortest_path(source, target, bidirectional=options["bidirectional"])
+        answer["source_id"] = source
+        answer["target_id"] = target
+        answer["degrees"] = None if path is None else len(path)
+        answer["path"] = path
+    answer["seconds"] = time.perf_counter() - start
+
+    return answer
+
+
+def build_landmarks(count):
+    """
+    Builds a landmark distance oracle with `count` landmarks over the
+    compact graph, which must already be loaded.
+    """
+    global oracle
+
+    if graph is None:
+        raise Exception("landmarks require the compact graph")
+    oracle = LandmarkOracle(graph, count)
+
+
+def build_components():
+    """
+    Labels the connected components of whichever store was loaded, and
+    returns the ComponentIndex, which shortest_path then consults.
+    """
+    global components
+
+    if graph is not None:
+        ids = graph.person_ids
+        casts = (
+            [ids[q] for q in graph.stars_of(m)] for m in range(len(graph.movie_ids))
+        )
+        components = ComponentIndex(ids, casts)
+    else:
+        components = ComponentIndex(people, (movie["stars"] for movie in movies.values()))
+    return components
+
+
+def apply_delta(directory):
+    """
+    Applies a delta directory to the loaded data without reloading it, and
+    updates the derived indexes (adjacency, components, names, landmarks).
+
+    The directory may contain any of people.csv and movies.csv (new people
+    and movies, with the same columns as the data files), stars.csv (star
+    rows to add) and removed_stars.csv (star rows to remove). Returns a
+    dictionary counting the changes applied.
+    """
+    global oracle
+
+    def rows(filename, columns):
+        path = os.path.join(directory, filename)
+        if not os.path.exists(path):
+            return
+        for chunk in read_rows(path, columns):
+            yield from chunk
+
+    changes = {"people": 0, "movies": 0, "stars_added": 0, "stars_removed": 0}
+    touched_movies = set()
+    removed_people = set()
+
+    for person_id, name, birth in rows("people.csv", ("id", "name", "birth")):
+        if graph is not None:
+            if person_id in graph.person_index:
+                continue
+            graph.add_person(person_id, name, birth)
+        elif person_id in people:
+            continue
+        else:
+            people[person_id] = {"name": name, "birth": birth, "movies": set()}
+        names.setdefault(name.lower(), set()).add(person_id)
+        if name_index is not None:
+            name_index.add(name)
+        if components is not None:
+            components.add(person_id)
+        changes["people"] += 1
+
+    for movie_id, title, year in rows("movies.csv", ("id", "title", "year")):
+        if graph is not None:
+            if movie_id in graph.movie_index:
+                continue
+            graph.add_movie(movie_id, title, year)
+        elif movie_id in movies:
+            continue
+        else:
+            movies[movie_id] = {"title": title, "year": year, "stars": set()}
+        changes["movies"] += 1
+
+    for person_id, movie_id in rows("stars.csv", ("person_id", "movie_id")):
+        if set_star(person_id, movie_id, True):
+            touched_movies.add(movie_id)
+            if components is not None:
+                # The rest of the cast is already one component
+                for other_id in cast_of(movie_id):
+                    if other_id != person_id:
+                        components.union(person_id, other_id)
+                        break
+            changes["stars_added"] += 1
+
+    # Both sides of every removed edge, to check whether they are still
+    # connected: the person, and someone left in the cast
+    separated = {}
+    for person_id, movie_id in rows("removed_stars.csv", ("person_id", "movie_id")):
+        if set_star(person_id, movie_id, False):
+            touched_movies.add(movie_id)
+            removed_people.add(person_id)
+            separated[person_id] = None
+            for other_id in cast_of(movie_id):
+                separated[other_id] = None
+                break
+            changes["stars_removed"] += 1
+
+    # Everyone in a changed cast may have gained or lost co-stars
+    if graph is not None:
+        affected = set(removed_people)
+        for movie_id in touched_movies:
+            affected.update(cast_of(movie_id))
+        if changes["people"]:
+            affected.update(graph.person_ids[len(graph.person_ids) - changes["people"] :])
+        graph.refresh_adjacency(graph.person_index[person_id] for person_id in affected)
+
+    if components is not None and separated:
+        components.split(
+            separated,
+            lambda person_id: [neighbor for _, neighbor in neighbors_for_person(person_id)],
+        )
+
+    # Landmark distances are only valid for the graph they were computed on
+    if oracle is not None and any(changes.values()):
+        oracle = LandmarkOracle(graph, len(oracle.landmarks))
+
+    return changes
+
+
+def set_star(person_id, movie_id, starred):
+    """
+    Adds (or, if `starred` is False, removes) the edge between a person and a
+    movie in whichever store was loaded. Returns True if anything changed;
+    unknown people and movies are ignored.
+    """
+    if graph is not None:
+        p = graph.person_index.get(person_id)
+        m = graph.movie_index.get(movie_id)
+        if p is None or m is None:
+            return False
+        if starred:
+            return graph.add_star(p, m)
+        return graph.remove_star(p, m)
+
+    if person_id not in people or movie_id not in movies:
+        return False
+    person_movies = people[person_id]["movies"]
+    if (movie_id in person_movies) == starred:
+        return False
+    if starred:
+        person_movies.add(movie_id)
+        movies[movie_id]["stars"].add(person_id)
+    else:
+        person_movies.discard(movie_id)
+        movies[movie_id]["stars"].discard(person_id)
+    return True
+
+
+def cast_of(movie_id):
+    """
+    Returns the person ids who starred in a movie.
+    """
+    if graph is not None:
+        return [graph.person_ids[p] for p in graph.stars_of(graph.movie_index[movie_id])]
+    return movies[movie_id]["stars"]
+
+
+def estimate_separation(source, target):
+    """
+    Returns (lower, upper) bounds on the degrees of separation between two
+    people from the landmark oracle. Both are None if the people are
+    disconnected; upper is None if it cannot be bounded.
+    """
+    if oracle is None:
+        raise Exception("no landmarks have been built")
+    return oracle.estimate(source, target)
+
+
+def reload_data(arguments):
+    """
+    Pool initializer for platforms without fork: loads the same data the
+    parent process loaded.
+    """
+    directory, compact, use_snapshot, adjacency = arguments
+    load_data(directory, compact=compact, use_snapshot=use_snapshot, adjacency=adjacency)
+
+
+def shortest_path(source, target, bidirectional=False):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
+    If `bidirectional` is True, searches from both ends at once.
+
     If no possible path, returns None.
     """
+    # People in different components can be answered without searching
+    if components is not None and not components.connected(source, target):
+        return None
+
+    if graph is not None:
+        if bidirectional:
+            return graph.bidirectional_shortest_path(source, target)
+        if oracle is not None:
+            return oracle.shortest_path(source, target)
+        return graph.shortest_path(source, target)
+
+    if bidirectional:
+        return bidirectional_shortest_path(source, target)
 
     # Zero degrees of separation our initial state is our goal state
     if source == target:
@@ -123,7 +569,7 @@ def shortest_path(source, target):
             movie_id, person_id = n
             neighbour_node = Node(parent=current, state=person_id, action=movie_id)
 
-            if person_id not in explored:
+            if person_id not in explored and not frontier.contains_state(person_id):
                 # If a neighbour node is our goal state, simply return the solution
                 if person_id == target:
                     return build_solution(neighbour_node)
@@ -134,6 +580,233 @@ def shortest_path(source, target):
     return None
 
 
+def bidirectional_shortest_path(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, searching breadth-first from both
+    people and always expanding the smaller frontier by a whole level.
+
+    If no possible path, returns None.
+    """
+    if source == target:
+        return []
+
+    # Each side maps a person to the (movie_id, person_id) step that leads
+    # back towards that side's starting person
+    forward = {source: None}
+    backward = {target: None}
+    forward_frontier = [source]
+    backward_frontier = [target]
+
+    while forward_frontier and backward_frontier:
+        if len(forward_frontier) <= len(backward_frontier):
+            forward_frontier, meeting = expand_level(forward_frontier, forward, backward)
+        else:
+            backward_frontier, meeting = expand_level(backward_frontier, backward, forward)
+
+        if meeting is not None:
+            return join_solution(forward, backward, meeting)
+
+    return None
+
+
+def expand_level(frontier, parents, other_parents):
+    """
+    Expands every person in `frontier` by one step, recording parents.
+
+    Returns the next frontier and the first person also reached by the other
+    side of the search, or None if the searches have not met yet.
+    """
+    next_frontier = []
+    for person_id in frontier:
+        for movie_id, neighbor_id in neighbors_for_person(person_id):
+            if neighbor_id in parents:
+                continue
+            parents[neighbor_id] = (movie_id, person_id)
+            if neighbor_id in other_parents:
+                return next_frontier, neighbor_id
+            next_frontier.append(neighbor_id)
+    return next_frontier, None
+
+
+def join_solution(forward, backward, meeting):
+    """
+    Joins the parent maps of both search directions at `meeting` into a list
+    of (movie_id, person_id) pairs from source to target.
+    """
+    # Walk back from the meeting person to the source
+    path = []
+    person_id = meeting
+    while forward[person_id] is not None:
+        movie_id, parent_id = forward[person_id]
+        path.append((movie_id, person_id))
+        person_id = parent_id
+    path.reverse()
+
+    # Walk forward from the meeting person to the target
+    person_id = meeting
+    while backward[person_id] is not None:
+        movie_id, person_id = backward[person_id]
+        path.append((movie_id, person_id))
+
+    return path
+
+
+def all_shortest_paths(source, target, k=None):
+    """
+    Yields every shortest list of (movie_id, person_id) pairs that connects
+    the source to the target, stopping after `k` paths if given. Only paths
+    of the minimum length are yielded; k_shortest_paths continues with
+    longer ones.
+
+    A layered BFS records every parent on the previous level of each person,
+    rather than the single parent of a Node chain, and paths are then
+    enumerated depth-first from the target so only one is held at a time.
+    Paths that differ only in a shared movie are distinct, unless the
+    co-star adjacency index (one movie per pair) is in use.
+
+    Yields nothing if there is no possible path.
+    """
+    if k is not None and k <= 0:
+        return
+    if components is not None and not components.connected(source, target):
+        return
+    if source == target:
+        yield []
+        return
+
+    # Level of every discovered person, and all of their parent steps
+    depth = {source: 0}
+    parents = {}
+    frontier = [source]
+    level = 0
+
+    while frontier and target not in parents:
+        level += 1
+        next_frontier = []
+        for person_id in frontier:
+            for movie_id, neighbor_id in neighbors_for_person(person_id):
+                neighbor_depth = depth.get(neighbor_id)
+                if neighbor_depth is None:
+                    depth[neighbor_id] = level
+                    parents[neighbor_id] = [(movie_id, person_id)]
+                    next_frontier.append(neighbor_id)
+                elif neighbor_depth == level:
+                    parents[neighbor_id].append((movie_id, person_id))
+        frontier = next_frontier
+
+    if target not in parents:
+        return
+
+    # Walk parent lists back from the target, keeping the path suffix so far
+    count = 0
+    suffix = []
+    people_on_path = [target]
+    choices = [iter(parents[target])]
+    while choices:
+        step = next(choices[-1], None)
+        if step is None:
+            choices.pop()
+            people_on_path.pop()
+            if suffix:
+                suffix.pop()
+            continue
+
+        movie_id, parent_id = step
+        suffix.append((movie_id, people_on_path[-1]))
+        if parent_id == source:
+            yield suffix[::-1]
+            count += 1
+            if count == k:
+                return
+            suffix.pop()
+        else:
+            people_on_path.append(parent_id)
+            choices.append(iter(parents[parent_id]))
+
+
+def k_shortest_paths(source, target, k):
+    """
+    Yields the `k` shortest simple lists of (movie_id, person_id) pairs that
+    connect the source to the target, shortest first, or all of them if
+    there are fewer.
+
+    The shortest paths come from all_shortest_paths. Longer ones are found
+    as in Yen's algorithm: every yielded path is branched at each person on
+    it, with a detour that leaves it there by a step no yielded path with
+    the same prefix takes, and avoids the people before it. The shortest of
+    these candidates is yielded next.
+    """
+    if k <= 0:
+        return
+
+    accepted = []
+    seen = set()
+    candidates = []
+    counter = itertools.count()
+
+    def branch(path):
+        for i in range(len(path)):
+            root = path[:i]
+            spur = root[-1][1] if root else source
+            removed = {other[i] for other in accepted if other[:i] == root}
+            blocked = {source} | {person_id for _, person_id in root}
+            blocked.discard(spur)
+            detour = restricted_path(spur, target, blocked, removed)
+            if detour is None:
+                continue
+            candidate = root + detour
+            if tuple(candidate) not in seen:
+                seen.add(tuple(candidate))
+                heapq.heappush(candidates, (len(candidate), next(counter), candidate))
+
+    for path in all_shortest_paths(source, target, k):
+        accepted.append(path)
+        seen.add(tuple(path))
+        yield path
+
+    # Every path of the minimum length is already known, so the detours of
+    # each can only be longer
+    for path in list(accepted):
+        branch(path)
+    while len(accepted) < k and candidates:
+        _, _, path = heapq.heappop(candidates)
+        accepted.append(path)
+        yield path
+        branch(path)
+
+
+def restricted_path(source, target, blocked, removed):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs that connects
+    the source to the target without passing through the `blocked` people
+    or starting with one of the `removed` steps, or None if there is none.
+    """
+    parents = {source: None}
+    frontier = [source]
+    while frontier:
+        next_frontier = []
+        for person_id in frontier:
+            for step in neighbors_for_person(person_id):
+                movie_id, neighbor_id = step
+                if neighbor_id in parents or neighbor_id in blocked:
+                    continue
+                if person_id == source and step in removed:
+                    continue
+                parents[neighbor_id] = (movie_id, person_id)
+                if neighbor_id == target:
+                    path = []
+                    while parents[neighbor_id] is not None:
+                        movie_id, parent_id = parents[neighbor_id]
+                        path.append((movie_id, neighbor_id))
+                        neighbor_id = parent_id
+                    path.reverse()
+                    return path
+                next_frontier.append(neighbor_id)
+        frontier = next_frontier
+    return None
+
+
 def build_solution(node):
     """
     Given a solution node, builds a list of states and actions tuples that resulted
@@ -150,18 +823,34 @@ def build_solution(node):
     return path
 
 
-def person_id_for_name(name):
+def person_id_for_name(name, policy="ask", max_distance=0):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
+
+    If no name matches exactly and `max_distance` is positive, the closest
+    names within that many edits are used instead. Ambiguities are resolved
+    by `policy`: "ask" prompts for the intended id, "most-movies" and
+    "earliest-birth" choose without prompting, and "none" gives up.
     """
     person_ids = list(names.get(name.lower(), set()))
+    if len(person_ids) == 0 and max_distance > 0:
+        matches = get_name_index().fuzzy(name, max_distance)
+        if matches:
+            closest = matches[0][0]
+            for distance, match in matches:
+                if distance == closest:
+                    person_ids.extend(names[match])
+
+    if len(person_ids) > 1 and policy != "ask":
+        return choose_person(person_ids, policy)
+
     if len(person_ids) == 0:
         return None
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
         for person_id in person_ids:
-            person = people[person_id]
+            person = person_info(person_id)
             name = person["name"]
             birth = person["birth"]
             print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
@@ -176,11 +865,47 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def choose_person(person_ids, policy):
+    """
+    Chooses one of several person ids without prompting, according to
+    `policy`, or returns None if the policy is "none".
+
+    Ties are broken by the smallest id, so results are reproducible.
+    """
+    person_ids = sorted(person_ids)
+    if policy == "most-movies":
+        return max(person_ids, key=lambda person_id: movie_count(person_id))
+    elif policy == "earliest-birth":
+        # People with no recorded birth year come last
+        def birth(person_id):
+            year = person_info(person_id)["birth"]
+            return int(year) if year.isdigit() else float("inf")
+
+        return min(person_ids, key=birth)
+    elif policy == "none":
+        return None
+    raise Exception(f"unknown policy {policy}")
+
+
+def get_name_index():
+    """
+    Returns the name index, building it from `names` on first use.
+    """
+    global name_index
+
+    if name_index is None:
+        name_index = NameIndex(names)
+    return name_index
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        return graph.neighbors_for_person(person_id)
+
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
@@ -189,5 +914,36 @@ def neighbors_for_person(person_id):
     return neighbors
 
 
+def person_info(person_id):
+    """
+    Returns a dictionary of name and birth for a person, from whichever
+    store was loaded.
+    """
+    if graph is not None:
+        p = graph.person_index[person_id]
+        return {"name": graph.person_names[p], "birth": graph.person_births[p]}
+    return people[person_id]
+
+
+def movie_count(person_id):
+    """
+    Returns the number of movies a person starred in.
+    """
+    if graph is not None:
+        return len(graph.movies_of(graph.person_index[person_id]))
+    return len(people[person_id]["movies"])
+
+
+def movie_info(movie_id):
+    """
+    Returns a dictionary of title and year for a movie, from whichever
+    store was loaded.
+    """
+    if graph is not None:
+        m = graph.movie_index[movie_id]
+        return {"title": graph.movie_titles[m], "year": graph.movie_years[m]}
+    return movies[movie_id]
+
+
 if __name__ == "__main__":
     main()
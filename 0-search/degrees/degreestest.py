@@ -0,0 +1,752 @@
+import asyncio
+import contextlib
+import gc
+import io
+import itertools
+import json
+import os
+import shutil
+import tempfile
+
+import analytics
+import components
+import degrees
+import server
+import snapshot
+from loader import paused_gc, read_rows
+from nameindex import NameIndex
+from util import Node, QueueFrontier, StackFrontier
+
+DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "small")
+
+
+def reset():
+    degrees.names.clear()
+    degrees.people.clear()
+    degrees.movies.clear()
+    degrees.graph = None
+    degrees.oracle = None
+    degrees.name_index = None
+    degrees.components = None
+
+
+def load(**kwargs):
+    reset()
+    kwargs.setdefault("use_snapshot", False)
+    degrees.load_data(DIRECTORY, **kwargs)
+
+
+def check_path(source, target, path):
+    # Every step must be a real co-star of the previous person
+    current = source
+    for movie_id, person_id in path:
+        assert (movie_id, person_id) in degrees.neighbors_for_person(current)
+        current = person_id
+    assert current == target
+
+
+def write_delta(directory):
+    files = {
+        "people.csv": 'id,name,birth\n7,"New Person",2000\n102,"Kevin Bacon",1958\n',
+        "movies.csv": 'id,title,year\n8,"New Movie",2020\n',
+        # Connect Emma Watson and the new person through the new movie to
+        # Kevin Bacon, and cut Kevin Bacon out of Apollo 13
+        "stars.csv": "person_id,movie_id\n914612,8\n7,8\n102,8\n102,8\n",
+        "removed_stars.csv": "person_id,movie_id\n102,112384\n",
+    }
+    for name, contents in files.items():
+        with open(os.path.join(directory, name), "w") as f:
+            f.write(contents)
+
+
+# Reference path lengths from the dict loader
+load()
+person_ids = sorted(degrees.people)
+expected = {}
+for source, target in itertools.product(person_ids, repeat=2):
+    path = degrees.shortest_path(source, target)
+    expected[source, target] = None if path is None else len(path)
+
+
+# COMPACT GRAPH TESTS ==================================
+print("TEST - compact graph")
+print("test case 1", end="")
+
+load(compact=True)
+assert sorted(degrees.graph.person_ids) == person_ids
+assert degrees.person_info("102")["name"] == "Kevin Bacon"
+assert degrees.movie_info("112384")["title"] == "Apollo 13"
+
+print(" - PASS")
+
+print("test case 2", end="")
+
+for (source, target), length in expected.items():
+    path = degrees.shortest_path(source, target)
+    if length is None:
+        assert path is None
+    else:
+        assert len(path) == length
+        check_path(source, target, path)
+
+print(" - PASS")
+
+
+# BIDIRECTIONAL SEARCH TESTS ==================================
+print("TEST - bidirectional search")
+
+for number, compact in enumerate([False, True], start=1):
+    print(f"test case {number}", end="")
+
+    load(compact=compact)
+    for (source, target), length in expected.items():
+        path = degrees.shortest_path(source, target, bidirectional=True)
+        if length is None:
+            assert path is None
+        else:
+            assert len(path) == length
+            check_path(source, target, path)
+
+    print(" - PASS")
+
+
+# FRONTIER TESTS ==================================
+print("TEST - frontiers")
+print("test case 1", end="")
+
+frontier = QueueFrontier()
+for state in ["a", "b", "a"]:
+    frontier.add(Node(state=state, parent=None, action=None))
+assert frontier.contains_state("a")
+assert frontier.remove().state == "a"
+assert frontier.contains_state("a")
+assert frontier.remove().state == "b"
+assert not frontier.contains_state("b")
+assert frontier.remove().state == "a"
+assert not frontier.contains_state("a")
+assert frontier.empty()
+
+print(" - PASS")
+
+print("test case 2", end="")
+
+frontier = StackFrontier()
+for state in ["a", "b"]:
+    frontier.add(Node(state=state, parent=None, action=None))
+assert frontier.remove().state == "b"
+assert not frontier.contains_state("b")
+assert frontier.remove().state == "a"
+try:
+    frontier.remove()
+    assert False
+except Exception as e:
+    assert str(e) == "empty frontier"
+
+print(" - PASS")
+
+
+# SNAPSHOT TESTS ==================================
+print("TEST - snapshots")
+print("test case 1", end="")
+
+with tempfile.TemporaryDirectory() as directory:
+    for name in snapshot.SOURCES:
+        shutil.copy(os.path.join(DIRECTORY, name), directory)
+
+    assert snapshot.load(directory) is None
+    built = snapshot.load_or_build(directory)
+    loaded = snapshot.load(directory)
+    assert loaded is not None
+    for name in snapshot.ARRAYS + snapshot.STRINGS:
+        assert list(getattr(loaded, name)) == list(getattr(built, name))
+    for (source, target), length in expected.items():
+        path = loaded.shortest_path(source, target)
+        assert (path is None) if length is None else (len(path) == length)
+
+    # Ids are found by binary search over the stored sorted tables
+    for person_id, p in built.person_index.items():
+        assert loaded.person_index[person_id] == p
+    for movie_id, m in built.movie_index.items():
+        assert loaded.movie_index.get(movie_id) == m
+    assert "0" not in loaded.person_index and loaded.movie_index.get("999") is None
+    del loaded
+
+    # Names are looked up the same way, and deltas are added on top
+    load()
+    by_name = dict(degrees.names)
+    reset()
+    degrees.load_data(directory, compact=True)
+    assert not isinstance(degrees.names, dict)
+    assert sorted(degrees.names) == sorted(by_name)
+    for name, ids in by_name.items():
+        assert degrees.names[name] == ids
+    assert degrees.person_id_for_name("KEVIN bacon") == "102"
+    assert degrees.person_id_for_name("Kevn Bacon", "none", 1) == "102"
+    assert degrees.names.get("nobody") is None
+
+    with tempfile.TemporaryDirectory() as delta:
+        write_delta(delta)
+        degrees.apply_delta(delta)
+    assert degrees.person_id_for_name("New Person") == "7"
+    assert degrees.names["kevin bacon"] == {"102"}
+    assert len(degrees.shortest_path("914612", "7")) == 1
+    assert degrees.movie_count("7") == 1
+    reset()
+
+    # Touching a CSV file invalidates the snapshot
+    with open(os.path.join(directory, "stars.csv"), "a") as f:
+        f.write("102,104257\n")
+    assert snapshot.load(directory) is None
+
+    # A CSV file rewritten while it is being parsed does not leave a snapshot
+    # that looks up to date
+    def rewrite(path, rows, seconds, done):
+        if done and path.endswith("movies.csv"):
+            os.utime(os.path.join(directory, "stars.csv"), ns=(0, 0))
+
+    snapshot.load_or_build(directory, progress=rewrite)
+    assert snapshot.load(directory) is None
+    snapshot.load_or_build(directory)
+    assert snapshot.load(directory) is not None
+
+print(" - PASS")
+
+
+# BATCH TESTS ==================================
+print("TEST - batch queries")
+
+load()
+queries = '"Kevin Bacon","Tom Hanks"\nNobody,Kevin Bacon\n\nTom Cruise,Emma Watson\n'
+for number, workers in enumerate([1, 2], start=1):
+    print(f"test case {number}", end="")
+
+    output = io.StringIO()
+    degrees.run_batch(io.StringIO(queries), output, workers=workers)
+    answers = [json.loads(line) for line in output.getvalue().splitlines()]
+
+    assert len(answers) == 3
+    assert answers[0]["degrees"] == 1
+    assert answers[0]["path"] == [["112384", "158"]]
+    assert "error" in answers[1]
+    assert answers[2]["path"] is None
+
+    print(" - PASS")
+
+
+# ADJACENCY TESTS ==================================
+print("TEST - co-star adjacency")
+print("test case 1", end="")
+
+load(adjacency=True)
+assert degrees.graph.costar_offsets is not None
+for (source, target), length in expected.items():
+    for bidirectional in [False, True]:
+        path = degrees.shortest_path(source, target, bidirectional=bidirectional)
+        if length is None:
+            assert path is None
+        else:
+            assert len(path) == length
+            check_path(source, target, path)
+
+print(" - PASS")
+
+print("test case 2", end="")
+
+# Each co-star appears once, and never the person themselves
+neighbors = degrees.neighbors_for_person("102")
+assert sorted(person_id for _, person_id in neighbors) == ["129", "158", "193", "197", "200", "641"]
+
+print(" - PASS")
+
+print("test case 3", end="")
+
+with tempfile.TemporaryDirectory() as directory:
+    for name in snapshot.SOURCES:
+        shutil.copy(os.path.join(DIRECTORY, name), directory)
+
+    assert snapshot.load_or_build(directory).costar_offsets is None
+    built = snapshot.load_or_build(directory, adjacency=True)
+    loaded = snapshot.load(directory)
+    for name in snapshot.ADJACENCY:
+        assert list(getattr(loaded, name)) == list(getattr(built, name))
+    del loaded
+
+    # A later plain compact load keeps every shared movie, as before the
+    # adjacency index was cached
+    reset()
+    degrees.load_data(directory, compact=True)
+    assert degrees.graph.costar_offsets is None
+    assert len(degrees.neighbors_for_person("102")) == 8
+    reset()
+    degrees.load_data(directory, adjacency=True)
+    assert len(degrees.neighbors_for_person("102")) == 6
+    reset()
+
+print(" - PASS")
+
+
+# LANDMARK TESTS ==================================
+print("TEST - landmarks")
+
+for number, count in enumerate([1, 3], start=1):
+    print(f"test case {number}", end="")
+
+    load(compact=True)
+    degrees.build_landmarks(count)
+    for (source, target), length in expected.items():
+        lower, upper = degrees.estimate_separation(source, target)
+        path = degrees.shortest_path(source, target)
+        if length is None:
+            assert path is None
+            assert lower is None
+        else:
+            assert len(path) == length
+            check_path(source, target, path)
+            assert lower <= length
+            assert upper is None or length <= upper
+
+    print(" - PASS")
+
+
+# ALL SHORTEST PATHS TESTS ==================================
+print("TEST - all shortest paths")
+
+
+def walks(source, target, length):
+    # Brute force: every (movie_id, person_id) walk of exactly `length` steps
+    if length == 0:
+        return [[]] if source == target else []
+    found = []
+    for movie_id, person_id in degrees.neighbors_for_person(source):
+        for rest in walks(person_id, target, length - 1):
+            found.append([(movie_id, person_id)] + rest)
+    return found
+
+
+for number, compact in enumerate([False, True], start=1):
+    print(f"test case {number}", end="")
+
+    load(compact=compact)
+    for (source, target), length in expected.items():
+        paths = list(degrees.all_shortest_paths(source, target))
+        if length is None:
+            assert paths == []
+            continue
+        expected_paths = walks(source, target, length)
+        assert sorted(paths) == sorted(expected_paths)
+        for path in paths:
+            check_path(source, target, path)
+
+    print(" - PASS")
+
+print("test case 3", end="")
+
+load()
+assert len(list(degrees.all_shortest_paths("102", "144"))) > 1
+assert len(list(degrees.all_shortest_paths("102", "144", k=1))) == 1
+assert list(degrees.all_shortest_paths("102", "102")) == [[]]
+
+print(" - PASS")
+
+print("test case 4", end="")
+
+
+def simple_paths(source, target, seen=None):
+    # Brute force: every (movie_id, person_id) path that repeats nobody
+    if source == target:
+        return [[]]
+    seen = (seen or set()) | {source}
+    found = []
+    for movie_id, person_id in degrees.neighbors_for_person(source):
+        if person_id not in seen:
+            for rest in simple_paths(person_id, target, seen):
+                found.append([(movie_id, person_id)] + rest)
+    return found
+
+
+# k_shortest_paths goes on past the shortest paths to longer ones
+for options in [{}, {"adjacency": True}]:
+    load(**options)
+    for source, target in [("102", "144"), ("102", "398"), ("914612", "102")]:
+        every = simple_paths(source, target)
+        for k in [1, 3, 10, len(every) + 5]:
+            paths = list(degrees.k_shortest_paths(source, target, k))
+            assert len(paths) == min(k, len(every))
+            assert [len(path) for path in paths] == sorted(len(path) for path in every)[:k]
+            assert len(set(map(tuple, paths))) == len(paths)
+            for path in paths:
+                assert path in every
+assert list(degrees.k_shortest_paths("102", "102", 3)) == [[]]
+assert list(degrees.k_shortest_paths("102", "144", 0)) == []
+
+print(" - PASS")
+
+
+# NAME INDEX TESTS ==================================
+print("TEST - name index")
+print("test case 1", end="")
+
+index = NameIndex({"kevin bacon": {"102"}, "kevin costner": {"1"}, "tom cruise": {"129"}})
+assert index.prefix("Kevin") == ["kevin bacon", "kevin costner"]
+assert index.prefix("kevin b") == ["kevin bacon"]
+assert index.prefix("x") == []
+assert index.prefix("", limit=1) == ["kevin bacon"]
+assert index.lookup("Tom Cruise") == {"129"}
+
+print(" - PASS")
+
+print("test case 2", end="")
+
+assert index.fuzzy("kevin bacon", 0) == [(0, "kevin bacon")]
+assert index.fuzzy("kevn bakon", 2) == [(2, "kevin bacon")]
+assert index.fuzzy("tom cruse", 2) == [(1, "tom cruise")]
+assert index.fuzzy("kevin", 1) == []
+
+# Compare against every name with a plain edit distance
+words = ["ab", "abc", "abd", "b", "ba", "bab", "cab", "xyz", "abcd", "aab"]
+index = NameIndex({word: {word} for word in words})
+
+
+def distance(a, b):
+    row = list(range(len(b) + 1))
+    for i, x in enumerate(a, start=1):
+        previous, row[0] = row[0], i
+        for j, y in enumerate(b, start=1):
+            previous, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, previous + (x != y))
+    return row[-1]
+
+
+for query in ["ab", "a", "bac", "", "xy", "abcde"]:
+    for max_distance in range(4):
+        brute = sorted(
+            (distance(query, word), word)
+            for word in words
+            if distance(query, word) <= max_distance
+        )
+        assert index.fuzzy(query, max_distance) == brute
+
+print(" - PASS")
+
+print("test case 3", end="")
+
+with tempfile.TemporaryDirectory() as directory:
+    for name in snapshot.SOURCES:
+        shutil.copy(os.path.join(DIRECTORY, name), directory)
+    with open(os.path.join(directory, "people.csv"), "a") as f:
+        f.write('999,"Kevin Bacon",1900\n')
+    with open(os.path.join(directory, "stars.csv"), "a") as f:
+        f.write("999,104257\n")
+
+    for compact in [False, True]:
+        reset()
+        degrees.load_data(directory, compact=compact, use_snapshot=False)
+        assert degrees.person_id_for_name("Kevin Bacon", "most-movies") == "102"
+        assert degrees.person_id_for_name("kevin bacon", "earliest-birth") == "999"
+        assert degrees.person_id_for_name("Kevin Bacon", "none") is None
+        assert degrees.person_id_for_name("Kevn Bacon", "most-movies") is None
+        assert degrees.person_id_for_name("Kevn Bacon", "most-movies", 1) == "102"
+        assert degrees.person_id_for_name("Tom Hanx", "none", 2) == "158"
+
+print(" - PASS")
+
+
+# COMPONENT TESTS ==================================
+print("TEST - components")
+
+for number, compact in enumerate([False, True], start=1):
+    print(f"test case {number}", end="")
+
+    load(compact=compact)
+    index = degrees.build_components()
+    for (source, target), length in expected.items():
+        assert index.connected(source, target) == (length is not None)
+        path = degrees.shortest_path(source, target)
+        assert (path is None) if length is None else (len(path) == length)
+
+    statistics = index.statistics()
+    assert statistics["people"] == len(person_ids)
+    assert statistics["components"] == 2
+    assert statistics["largest"] == len(person_ids) - 1
+    assert statistics["singletons"] == 1
+    assert index.component_size("914612") == 1
+
+    print(" - PASS")
+
+print("test case 3", end="")
+
+# A movie's cast held a long chain and two pairs together; dropping the pairs
+# from it splits three ways without walking the chain
+chain = [f"p{i}" for i in range(1000)]
+casts = [["x", "y", "p0"], ["x", "x2"], ["y", "y2"]] + [list(pair) for pair in zip(chain, chain[1:])]
+index = components.ComponentIndex(chain + ["x", "x2", "y", "y2"], casts)
+assert index.statistics()["components"] == 1
+casts[0] = ["p0"]
+
+calls = []
+
+def costars(person_id):
+    calls.append(person_id)
+    return [other for cast in casts if person_id in cast for other in cast if other != person_id]
+
+index.split(["x", "p0", "y", "p0"], costars)
+assert index.sizes() == [1000, 2, 2]
+assert index.connected("x", "x2") and index.connected("y", "y2")
+assert not index.connected("x", "y") and not index.connected("x", "p999")
+assert index.statistics()["people"] == 1004
+assert len(calls) < 20
+
+print(" - PASS")
+
+
+# STREAMING LOADER TESTS ==================================
+print("TEST - streaming loader")
+print("test case 1", end="")
+
+reports = []
+chunks = list(
+    read_rows(
+        os.path.join(DIRECTORY, "stars.csv"),
+        ("movie_id", "person_id"),
+        progress=lambda *report: reports.append(report),
+        chunk_size=8,
+    )
+)
+assert [len(chunk) for chunk in chunks] == [8, 8, 4]
+assert chunks[0][0] == ("104257", "102")
+assert reports[-1][1] == 20 and reports[-1][3]
+
+# A single column still comes back as 1-tuples
+chunks = list(read_rows(os.path.join(DIRECTORY, "people.csv"), ("name",)))
+assert chunks[0][0] == ("Kevin Bacon",) and len(chunks[0]) == 16
+
+# Loading pauses the garbage collector and restores it afterwards
+assert gc.isenabled()
+with paused_gc():
+    assert not gc.isenabled()
+assert gc.isenabled()
+
+print(" - PASS")
+
+print("test case 2", end="")
+
+with tempfile.TemporaryDirectory() as directory:
+    for name in snapshot.SOURCES:
+        shutil.copy(os.path.join(DIRECTORY, name), directory)
+
+    # Duplicate and dangling star rows are ignored by both loaders
+    with open(os.path.join(directory, "stars.csv"), "a") as f:
+        f.write("102,104257\n102,112384\n1,104257\n")
+
+    reset()
+    degrees.load_data(directory)
+    movies_of = {person_id: person["movies"] for person_id, person in degrees.people.items()}
+    stars_of = {movie_id: movie["stars"] for movie_id, movie in degrees.movies.items()}
+
+    graph = degrees.CompactGraph.from_csv(directory)
+    for p, person_id in enumerate(graph.person_ids):
+        row = [graph.movie_ids[m] for m in graph.movies_of(p)]
+        assert len(row) == len(set(row)) and set(row) == movies_of[person_id]
+    for m, movie_id in enumerate(graph.movie_ids):
+        row = [graph.person_ids[p] for p in graph.stars_of(m)]
+        assert len(row) == len(set(row)) and set(row) == stars_of[movie_id]
+
+print(" - PASS")
+
+
+# DELTA TESTS ==================================
+print("TEST - incremental updates")
+
+
+with tempfile.TemporaryDirectory() as delta:
+    write_delta(delta)
+
+    for number, options in enumerate(
+        [{}, {"compact": True}, {"adjacency": True}], start=1
+    ):
+        print(f"test case {number}", end="")
+
+        load(**options)
+        index = degrees.build_components()
+        degrees.get_name_index()
+        assert degrees.shortest_path("914612", "102") is None
+
+        changes = degrees.apply_delta(delta)
+        assert changes == {"people": 1, "movies": 1, "stars_added": 3, "stars_removed": 1}
+
+        assert degrees.person_id_for_name("New Persn", "none", 1) == "7"
+        assert index.connected("914612", "7") and index.connected("7", "129")
+        assert len(degrees.shortest_path("914612", "102")) == 1
+        assert len(degrees.shortest_path("7", "102", bidirectional=True)) == 1
+
+        # Apollo 13 was Kevin Bacon's only link to Tom Hanks
+        assert not index.connected("102", "158")
+        assert degrees.shortest_path("102", "158") is None
+        assert degrees.shortest_path("7", "158") is None
+
+        path = degrees.shortest_path("7", "129")
+        check_path("7", "129", path)
+        assert sorted(degrees.all_shortest_paths("7", "129")) == sorted(walks("7", "129", 2))
+
+        print(" - PASS")
+
+print("test case 4", end="")
+
+# Removing someone's only movie splits them into their own component
+with tempfile.TemporaryDirectory() as delta:
+    with open(os.path.join(delta, "removed_stars.csv"), "w") as f:
+        f.write("person_id,movie_id\n420,95953\n")
+
+    for compact in [False, True]:
+        load(compact=compact)
+        index = degrees.build_components()
+        degrees.apply_delta(delta)
+        assert index.component_size("420") == 1
+        assert degrees.shortest_path("420", "102") is None
+        assert index.statistics()["components"] == 3
+
+print(" - PASS")
+
+print("test case 5", end="")
+
+# The most-movies policy counts the movies of new and patched people
+with tempfile.TemporaryDirectory() as first, tempfile.TemporaryDirectory() as second:
+    with open(os.path.join(first, "people.csv"), "w") as f:
+        f.write('id,name,birth\n9,"Emma Watson",1991\n')
+    with open(os.path.join(first, "stars.csv"), "w") as f:
+        f.write("person_id,movie_id\n9,104257\n9,95953\n")
+    with open(os.path.join(second, "stars.csv"), "w") as f:
+        f.write("person_id,movie_id\n914612,93779\n914612,109830\n914612,112384\n")
+
+    for options in [{}, {"compact": True}, {"adjacency": True}]:
+        load(**options)
+        degrees.apply_delta(first)
+        assert degrees.movie_count("9") == 2 and degrees.movie_count("914612") == 0
+        assert degrees.person_id_for_name("Emma Watson", "most-movies") == "9"
+
+        degrees.apply_delta(second)
+        assert degrees.movie_count("914612") == 3
+        assert degrees.person_id_for_name("Emma Watson", "most-movies") == "914612"
+        check_path("914612", "163", degrees.shortest_path("914612", "163"))
+        assert len(degrees.shortest_path("9", "102")) == 1
+
+print(" - PASS")
+
+
+# ANALYTICS TESTS ==================================
+print("TEST - analytics")
+
+for number, workers in enumerate([1, 2], start=1):
+    print(f"test case {number}", end="")
+
+    load(adjacency=True)
+    report = analytics.analyse(degrees.graph, betweenness_sample=100, workers=workers)
+
+    histogram = {}
+    for (source, target), length in expected.items():
+        if length:
+            histogram[length] = histogram.get(length, 0) + 1
+    assert report["distance_histogram"] == histogram
+    assert report["sources"] == len(person_ids)
+
+    for person_id in person_ids:
+        lengths = [
+            length
+            for (source, _), length in expected.items()
+            if source == person_id and length is not None
+        ]
+        assert report["eccentricity"][person_id] == max(lengths)
+        if max(lengths):
+            assert abs(report["closeness"][person_id] - (len(lengths) - 1) / sum(lengths)) < 1e-9
+
+    # Brute force betweenness over unordered pairs
+    betweenness = {}
+    for source, target in itertools.combinations(person_ids, 2):
+        paths = list(degrees.all_shortest_paths(source, target))
+        for path in paths:
+            for _, person_id in path[:-1]:
+                betweenness[person_id] = betweenness.get(person_id, 0) + 1 / len(paths)
+    for person_id in person_ids:
+        estimate = report["betweenness"].get(person_id, 0)
+        assert abs(estimate - betweenness.get(person_id, 0)) < 1e-9
+
+    print(" - PASS")
+
+print("test case 3", end="")
+
+load(adjacency=True)
+report = analytics.analyse(degrees.graph, sample=5, seed=1)
+assert report["sources"] == 5 and len(report["eccentricity"]) == 5
+
+print(" - PASS")
+
+
+# SERVER TESTS ==================================
+print("TEST - query server")
+print("test case 1", end="")
+
+
+async def get(port, target):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET {target} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, body = response.split(b"\r\n\r\n", 1)
+    return int(head.split()[1]), json.loads(body)
+
+
+async def exercise(service):
+    listener = await server.serve(service, port=0)
+    port = listener.sockets[0].getsockname()[1]
+    try:
+        status, body = await get(port, "/path?source=Kevin+Bacon&target=Tom%20Cruise")
+        assert status == 200 and body["degrees"] == 1
+        status, body = await get(port, "/path?source=kevin+bacon&target=tom+cruise")
+        assert status == 200 and body["degrees"] == 1
+        status, body = await get(port, "/path?source=Kevin+Bacon&target=Emma+Watson")
+        assert status == 200 and body["path"] is None
+        status, body = await get(port, "/path?source=Kevn+Bacon&target=Tom+Hanks&fuzzy=1")
+        assert status == 200 and body["degrees"] == 1
+        status, body = await get(port, "/path?source=Kevin+Bacon")
+        assert status == 400
+        status, body = await get(port, "/nowhere")
+        assert status == 404
+
+        status, body = await get(port, "/stats")
+        assert status == 200
+        assert body["cache"]["hits"] == 1 and body["cache"]["misses"] == 3
+        assert body["requests"] == 6
+        assert sum(body["latency"].values()) == 6
+
+        # A malformed request line is a 400, and a failing query a 500
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"GARBAGE\r\n\r\n")
+        response = await reader.read()
+        writer.close()
+        assert response.startswith(b"HTTP/1.1 400 ")
+
+        async def broken(source, target, options):
+            raise RuntimeError("search failed")
+
+        service.path = broken
+        with contextlib.redirect_stderr(io.StringIO()) as errors:
+            status, body = await get(port, "/path?source=Kevin+Bacon&target=Tom+Hanks")
+        assert status == 500 and "error" in body
+        assert "search failed" in errors.getvalue()
+        status, body = await get(port, "/health")
+        assert status == 200 and service.requests == 10
+        del service.path
+    finally:
+        listener.close()
+        await listener.wait_closed()
+
+
+load(compact=True)
+service = server.QueryService(workers=2, cache_size=2)
+try:
+    asyncio.run(exercise(service))
+    assert len(service.cache) == 2
+finally:
+    service.close()
+
+print(" - PASS")
@@ -0,0 +1,476 @@
+from array import array
+from bisect import bisect_left
+from collections import deque
+
+from loader import paused_gc, read_rows
+
+
+class CompactGraph():
+    """
+    Bipartite star graph with people and movies interned to dense integers.
+
+    Person and movie IMDB ids are mapped to indices 0..n-1, and the edges are
+    stored twice in CSR form: the movies of person `p` are
+    `person_movies[person_offsets[p]:person_offsets[p + 1]]` and the stars of
+    movie `m` are `movie_stars[movie_offsets[m]:movie_offsets[m + 1]]`.
+    """
+
+    def __init__(self):
+        # Interned people, looked up by index or by IMDB id
+        self.person_ids = []
+        self.person_index = {}
+        self.person_names = []
+        self.person_births = []
+
+        # Interned movies, looked up by index or by IMDB id
+        self.movie_ids = []
+        self.movie_index = {}
+        self.movie_titles = []
+        self.movie_years = []
+
+        # CSR adjacency in both directions
+        self.person_offsets = array("i", [0])
+        self.person_movies = array("i")
+        self.movie_offsets = array("i", [0])
+        self.movie_stars = array("i")
+
+        # Optional co-star adjacency: each person's distinct co-stars, with
+        # one shared movie per co-star, in CSR form
+        self.costar_offsets = None
+        self.costars = None
+        self.costar_movies = None
+
+        # Rows changed since the arrays above were built, which replace the
+        # corresponding CSR rows; new people and movies only have these
+        self.person_patch = {}
+        self.movie_patch = {}
+        self.costar_patch = {}
+
+        # Person indices sorted by lowercase name, if loaded from a snapshot
+        self.name_order = None
+
+    @classmethod
+    @paused_gc()
+    def from_csv(cls, directory, progress=None):
+        """
+        Builds a graph from the people, movies and stars CSV files in
+        `directory`, streaming each file in chunks. `progress` is passed on
+        to read_rows.
+        """
+        graph = cls()
+
+        for chunk in read_rows(f"{directory}/people.csv", ("id", "name", "birth"), progress):
+            for person_id, name, birth in chunk:
+                graph.add_person(person_id, name, birth)
+
+        for chunk in read_rows(f"{directory}/movies.csv", ("id", "title", "year"), progress):
+            for movie_id, title, year in chunk:
+                graph.add_movie(movie_id, title, year)
+
+        # Collect edges as two parallel integer arrays, skipping unknown ids
+        edge_people, edge_movies = array("i"), array("i")
+        person_index, movie_index = graph.person_index, graph.movie_index
+        for chunk in read_rows(
+            f"{directory}/stars.csv", ("person_id", "movie_id"), progress
+        ):
+            for person_id, movie_id in chunk:
+                p = person_index.get(person_id)
+                m = movie_index.get(movie_id)
+                if p is None or m is None:
+                    continue
+                edge_people.append(p)
+                edge_movies.append(m)
+
+        graph.build(edge_people, edge_movies)
+        return graph
+
+    def add_person(self, person_id, name, birth):
+        """
+        Interns a person, returning their index.
+        """
+        if person_id in self.person_index:
+            return self.person_index[person_id]
+        p = len(self.person_ids)
+        self.person_index[person_id] = p
+        self.person_ids.append(person_id)
+        self.person_names.append(name)
+        self.person_births.append(birth)
+        return p
+
+    def add_movie(self, movie_id, title, year):
+        """
+        Interns a movie, returning its index.
+        """
+        if movie_id in self.movie_index:
+            return self.movie_index[movie_id]
+        m = len(self.movie_ids)
+        self.movie_index[movie_id] = m
+        self.movie_ids.append(movie_id)
+        self.movie_titles.append(title)
+        self.movie_years.append(year)
+        return m
+
+    def build(self, edge_people, edge_movies):
+        """
+        Builds both CSR directions from parallel arrays of (person, movie)
+        edges. Duplicate edges are dropped.
+
+        Each edge is packed into one integer, person * movies + movie, so a
+        single sort of the distinct keys groups the edges by person, with
+        each person's movies in order. The edge arrays are consumed (emptied)
+        once packed, and the movie direction is derived from the person
+        direction.
+        """
+        count = len(self.movie_ids) or 1
+        keys = sorted({p * count + m for p, m in zip(edge_people, edge_movies)})
+        del edge_people[:], edge_movies[:]
+
+        owners = array("i", [key // count for key in keys])
+        self.person_movies = array("i", [key % count for key in keys])
+        del keys
+        self.person_offsets = _offsets(len(self.person_ids), owners)
+        self.movie_offsets, self.movie_stars = _csr(len(self.movie_ids), self.person_movies, owners)
+
+    def movies_of(self, p):
+        """
+        Returns the movie indices person index `p` starred in.
+        """
+        if p in self.person_patch:
+            return self.person_patch[p]
+        if p >= len(self.person_offsets) - 1:
+            return ()
+        return self.person_movies[self.person_offsets[p] : self.person_offsets[p + 1]]
+
+    def stars_of(self, m):
+        """
+        Returns the person indices who starred in movie index `m`.
+        """
+        if m in self.movie_patch:
+            return self.movie_patch[m]
+        if m >= len(self.movie_offsets) - 1:
+            return ()
+        return self.movie_stars[self.movie_offsets[m] : self.movie_offsets[m + 1]]
+
+    def add_star(self, p, m):
+        """
+        Records that person index `p` starred in movie index `m`, patching
+        both rows. Returns False if the edge already existed.
+        """
+        movies = self.movies_of(p)
+        if m in movies:
+            return False
+        self.person_patch[p] = array("i", movies) + array("i", [m])
+        self.movie_patch[m] = array("i", self.stars_of(m)) + array("i", [p])
+        return True
+
+    def remove_star(self, p, m):
+        """
+        Removes the edge between person index `p` and movie index `m`,
+        patching both rows. Returns False if there was no such edge.
+        """
+        movies = self.movies_of(p)
+        if m not in movies:
+            return False
+        self.person_patch[p] = array("i", (x for x in movies if x != m))
+        self.movie_patch[m] = array("i", (q for q in self.stars_of(m) if q != p))
+        return True
+
+    def refresh_adjacency(self, people):
+        """
+        Recomputes the co-stars of the given person indices after their
+        movies changed, if the adjacency index has been built.
+        """
+        if self.costar_offsets is None:
+            return
+        for p in people:
+            shared = self._shared_movies(p)
+            self.costar_patch[p] = (
+                array("i", shared.keys()),
+                array("i", shared.values()),
+            )
+
+    def build_adjacency(self):
+        """
+        Precomputes every person's distinct co-stars, with one representative
+        movie each.
+
+        People are processed one at a time, so apart from the output arrays
+        only a single person's co-star dict is alive during construction.
+        """
+        offsets = array("i", [0])
+        costars = array("i")
+        costar_movies = array("i")
+
+        for p in range(len(self.person_ids)):
+            shared = self._shared_movies(p)
+            costars.extend(shared.keys())
+            costar_movies.extend(shared.values())
+            offsets.append(len(costars))
+
+        self.costar_offsets = offsets
+        self.costars = costars
+        self.costar_movies = costar_movies
+        self.costar_patch = {}
+
+    def costars_of(self, p):
+        """
+        Returns parallel sequences of co-star indices and a shared movie index
+        for each, from the adjacency index if it has been built.
+        """
+        if self.costar_offsets is not None:
+            if p in self.costar_patch:
+                return self.costar_patch[p]
+            if p < len(self.costar_offsets) - 1:
+                start, end = self.costar_offsets[p], self.costar_offsets[p + 1]
+                return self.costars[start:end], self.costar_movies[start:end]
+
+        shared = self._shared_movies(p)
+        return list(shared.keys()), list(shared.values())
+
+    def _shared_movies(self, p):
+        """
+        Returns a dict from each co-star of person index `p` to the first
+        movie found that they share.
+        """
+        shared = {}
+        for m in self.movies_of(p):
+            for q in self.stars_of(m):
+                if q != p and q not in shared:
+                    shared[q] = m
+        return shared
+
+    def neighbors_for_person(self, person_id):
+        """
+        Returns (movie_id, person_id) pairs for people
+        who starred with a given person.
+
+        With the adjacency index built, each co-star appears once, with a
+        single movie they share.
+        """
+        if self.costar_offsets is not None:
+            p = self.person_index[person_id]
+            costars, shared = self.costars_of(p)
+            return [
+                (self.movie_ids[m], self.person_ids[q]) for q, m in zip(costars, shared)
+            ]
+
+        neighbors = set()
+        for m in self.movies_of(self.person_index[person_id]):
+            movie_id = self.movie_ids[m]
+            for q in self.stars_of(m):
+                neighbors.add((movie_id, self.person_ids[q]))
+        return neighbors
+
+    def shortest_path(self, source, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target.
+
+        Searches in index space: parents are kept in flat arrays rather than
+        Node chains, and each movie's cast is expanded at most once.
+        """
+        if source == target:
+            return []
+
+        s = self.person_index[source]
+        t = self.person_index[target]
+
+        # Parent person and movie of every discovered person, -1 if unseen
+        parent_person = array("i", [-1]) * len(self.person_ids)
+        parent_movie = array("i", [-1]) * len(self.person_ids)
+        expanded_movies = bytearray(len(self.movie_ids))
+        parent_person[s] = s
+
+        frontier = deque([s])
+
+        # With the adjacency index, expansion walks flat array ranges, except
+        # for people patched or added since it was built
+        if self.costar_offsets is not None:
+            offsets, costars, shared = self.costar_offsets, self.costars, self.costar_movies
+            patch, indexed = self.costar_patch, len(offsets) - 1
+            while frontier:
+                p = frontier.popleft()
+                if p in patch or p >= indexed:
+                    row_costars, row_movies = self.costars_of(p)
+                    start, end = 0, len(row_costars)
+                else:
+                    row_costars, row_movies = costars, shared
+                    start, end = offsets[p], offsets[p + 1]
+                for i in range(start, end):
+                    q = row_costars[i]
+                    if parent_person[q] != -1:
+                        continue
+                    parent_person[q] = p
+                    parent_movie[q] = row_movies[i]
+                    if q == t:
+                        return self._build_solution(parent_person, parent_movie, s, t)
+                    frontier.append(q)
+            return None
+
+        while frontier:
+            p = frontier.popleft()
+            for m in self.movies_of(p):
+                if expanded_movies[m]:
+                    continue
+                expanded_movies[m] = 1
+                for q in self.stars_of(m):
+                    if parent_person[q] != -1:
+                        continue
+                    parent_person[q] = p
+                    parent_movie[q] = m
+                    if q == t:
+                        return self._build_solution(parent_person, parent_movie, s, t)
+                    frontier.append(q)
+
+        return None
+
+    def bidirectional_shortest_path(self, source, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, searching from both people
+        and always expanding the smaller frontier by a whole level.
+
+        Visited state is kept in dicts sized by the explored region rather
+        than arrays sized by the whole graph.
+        """
+        if source == target:
+            return []
+
+        s = self.person_index[source]
+        t = self.person_index[target]
+
+        # Each side maps a person index to its (movie, person) parent step
+        forward = {s: None}
+        backward = {t: None}
+        forward_frontier = [s]
+        backward_frontier = [t]
+
+        while forward_frontier and backward_frontier:
+            if len(forward_frontier) <= len(backward_frontier):
+                forward_frontier, meeting = self._expand_level(
+                    forward_frontier, forward, backward
+                )
+            else:
+                backward_frontier, meeting = self._expand_level(
+                    backward_frontier, backward, forward
+                )
+
+            if meeting is not None:
+                return self._join_solution(forward, backward, meeting)
+
+        return None
+
+    def _expand_level(self, frontier, parents, other_parents):
+        """
+        Expands a whole frontier level, returning the next level and the
+        first person index reached by both sides, if any.
+        """
+        next_frontier = []
+        for p in frontier:
+            for q, m in zip(*self.costars_of(p)):
+                if q in parents:
+                    continue
+                parents[q] = (m, p)
+                if q in other_parents:
+                    return next_frontier, q
+                next_frontier.append(q)
+        return next_frontier, None
+
+    def _join_solution(self, forward, backward, meeting):
+        """
+        Joins both parent maps at `meeting` into a list of
+        (movie_id, person_id) pairs from source to target.
+        """
+        path = []
+        q = meeting
+        while forward[q] is not None:
+            m, p = forward[q]
+            path.append((self.movie_ids[m], self.person_ids[q]))
+            q = p
+        path.reverse()
+
+        q = meeting
+        while backward[q] is not None:
+            m, q = backward[q]
+            path.append((self.movie_ids[m], self.person_ids[q]))
+
+        return path
+
+    def _build_solution(self, parent_person, parent_movie, s, t):
+        """
+        Backtracks parent arrays from `t` to `s` into a list of
+        (movie_id, person_id) pairs.
+        """
+        path = []
+        while t != s:
+            path.append((self.movie_ids[parent_movie[t]], self.person_ids[t]))
+            t = parent_person[t]
+        path.reverse()
+        return path
+
+
+class SortedIndex():
+    """
+    Maps keys to their positions in `keys`, like a dict, by binary search
+    over `order`: the positions sorted by key. Keys added afterwards are
+    kept in a dict.
+
+    Snapshots store `order`, so a loaded graph does not have to build a
+    dict of every id before answering its first query.
+    """
+
+    def __init__(self, keys, order):
+        self.keys = keys
+        self.order = order
+        self.added = {}
+
+    def get(self, key, default=None):
+        if key in self.added:
+            return self.added[key]
+        order = self.order
+        i = bisect_left(order, key, key=self.keys.__getitem__)
+        if i < len(order) and self.keys[order[i]] == key:
+            return order[i]
+        return default
+
+    def __getitem__(self, key):
+        position = self.get(key)
+        if position is None:
+            raise KeyError(key)
+        return position
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __setitem__(self, key, position):
+        self.added[key] = position
+
+
+def _offsets(count, sources):
+    """
+    Returns the CSR offsets of `count` source vertices, counting how often
+    each appears in `sources`.
+    """
+    offsets = array("i", [0]) * (count + 1)
+    for s in sources:
+        offsets[s + 1] += 1
+    for i in range(count):
+        offsets[i + 1] += offsets[i]
+    return offsets
+
+
+def _csr(count, sources, targets):
+    """
+    Counting-sorts parallel (source, target) arrays into CSR offsets and
+    neighbor arrays for `count` source vertices.
+    """
+    offsets = _offsets(count, sources)
+
+    # Fill each source's slot range using a moving cursor
+    cursor = array("i", offsets)
+    neighbors = array("i", [0]) * len(targets)
+    for s, t in zip(sources, targets):
+        neighbors[cursor[s]] = t
+        cursor[s] += 1
+
+    return offsets, neighbors
@@ -0,0 +1,141 @@
+import heapq
+
+from array import array
+from collections import deque
+
+# Distance stored for people a landmark cannot reach
+UNREACHABLE = 0xFFFF
+
+
+class LandmarkOracle():
+    """
+    Distance oracle over a CompactGraph's co-star graph.
+
+    A few landmark people are chosen and a BFS from each stores every person's
+    distance to it. By the triangle inequality these give instant lower and
+    upper bounds on any separation, and an admissible heuristic for A* (the
+    ALT technique).
+    """
+
+    def __init__(self, graph, count=8):
+        self.graph = graph
+        self.landmarks = []
+        self.distances = []
+
+        # Farthest-point selection: start at the best-connected person, then
+        # repeatedly add whoever is farthest from all landmarks chosen so far
+        n = len(graph.person_ids)
+        if n == 0:
+            return
+        nearest = array("H", [UNREACHABLE]) * n
+        candidate = max(range(n), key=lambda p: len(graph.costars_of(p)[0]))
+        for _ in range(min(count, n)):
+            self.landmarks.append(candidate)
+            distances = self.bfs(candidate)
+            self.distances.append(distances)
+            for p in range(n):
+                if distances[p] < nearest[p]:
+                    nearest[p] = distances[p]
+
+            # Unreachable people come first, so other components get covered
+            candidate = max(range(n), key=nearest.__getitem__)
+            if nearest[candidate] == 0:
+                break
+
+    def bfs(self, source):
+        """
+        Returns an array of hop distances from person index `source`.
+        """
+        distances = array("H", [UNREACHABLE]) * len(self.graph.person_ids)
+        distances[source] = 0
+        frontier = deque([source])
+        while frontier:
+            p = frontier.popleft()
+            d = distances[p] + 1
+            for q in self.graph.costars_of(p)[0]:
+                if distances[q] == UNREACHABLE:
+                    distances[q] = d
+                    frontier.append(q)
+        return distances
+
+    def bounds(self, s, t):
+        """
+        Returns (lower, upper) bounds on the separation of person indices `s`
+        and `t`. Both are None if the people are known to be disconnected;
+        upper is None if no landmark reaches them.
+        """
+        lower, upper = 0, None
+        for distances in self.distances:
+            ds, dt = distances[s], distances[t]
+            if ds == UNREACHABLE and dt == UNREACHABLE:
+                continue
+            if ds == UNREACHABLE or dt == UNREACHABLE:
+                return None, None
+            lower = max(lower, abs(ds - dt))
+            if upper is None or ds + dt < upper:
+                upper = ds + dt
+        return lower, upper
+
+    def estimate(self, source, target):
+        """
+        Returns (lower, upper) bounds on the degrees of separation between
+        two IMDB person ids.
+        """
+        index = self.graph.person_index
+        return self.bounds(index[source], index[target])
+
+    def shortest_path(self, source, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, using A* with the landmark
+        lower bound as heuristic.
+
+        If no possible path, returns None.
+        """
+        if source == target:
+            return []
+
+        s = self.graph.person_index[source]
+        t = self.graph.person_index[target]
+        if self.bounds(s, t) == (None, None):
+            return None
+
+        # Lower bounds of every person towards t, from each landmark
+        targets = [(distances, distances[t]) for distances in self.distances]
+
+        def heuristic(p):
+            h = 0
+            for distances, dt in targets:
+                dp = distances[p]
+                if dp != UNREACHABLE and dt != UNREACHABLE and abs(dp - dt) > h:
+                    h = abs(dp - dt)
+            return h
+
+        parents = {s: None}
+        cost = {s: 0}
+        frontier = [(heuristic(s), 0, s)]
+        while frontier:
+            _, g, p = heapq.heappop(frontier)
+            if p == t:
+                return self._build_solution(parents, t)
+            if g > cost[p]:
+                continue
+
+            costars, shared = self.graph.costars_of(p)
+            for q, m in zip(costars, shared):
+                if q in cost and cost[q] <= g + 1:
+                    continue
+                cost[q] = g + 1
+                parents[q] = (m, p)
+                heapq.heappush(frontier, (g + 1 + heuristic(q), g + 1, q))
+
+        return None
+
+    def _build_solution(self, parents, t):
+        path = []
+        while parents[t] is not None:
+            m, p = parents[t]
+            path.append((self.graph.movie_ids[m], self.graph.person_ids[t]))
+            t = p
+        path.reverse()
+        return path
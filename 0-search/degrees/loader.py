@@ -0,0 +1,95 @@
+import csv
+import gc
+import itertools
+import sys
+import time
+
+from contextlib import contextmanager
+from operator import itemgetter
+
+# Rows parsed per chunk when streaming a CSV file
+CHUNK_SIZE = 65536
+
+
+def read_rows(path, columns, progress=None, chunk_size=CHUNK_SIZE):
+    """
+    Streams a CSV file as chunks of tuples holding only `columns`, in that
+    order, using the header to find them.
+
+    Rows are parsed by csv.reader rather than DictReader, so no dictionary is
+    built per row, and at most one chunk is held at a time. If `progress` is
+    given, it is called as progress(path, rows, seconds, done) after every
+    chunk.
+    """
+    start = time.perf_counter()
+    rows = 0
+    with open(path, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        try:
+            indices = [header.index(column) for column in columns]
+        except ValueError:
+            raise Exception(f"{path} must have columns {', '.join(columns)}")
+
+        # itemgetter returns a tuple for two or more indices, but a bare
+        # value for one
+        if len(indices) == 1:
+            index = indices[0]
+            pick = lambda row: (row[index],)
+        else:
+            pick = itemgetter(*indices)
+
+        while True:
+            raw = list(itertools.islice(reader, chunk_size))
+            if not raw:
+                break
+            chunk = list(map(pick, filter(None, raw)))
+            rows += len(chunk)
+            yield chunk
+            if progress is not None:
+                progress(path, rows, time.perf_counter() - start, False)
+
+    if progress is not None:
+        progress(path, rows, time.perf_counter() - start, True)
+
+
+@contextmanager
+def paused_gc():
+    """
+    Disables the cyclic garbage collector while bulk loading, restoring it
+    afterwards. Also usable as a decorator.
+
+    A load keeps millions of new objects alive, so the collector would
+    otherwise run full collections over the growing heap again and again
+    without freeing anything.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+class Progress():
+    """
+    Progress reporter for read_rows that prints rows read and throughput,
+    at most once per `interval` seconds per file.
+    """
+
+    def __init__(self, file=sys.stderr, interval=1.0):
+        self.file = file
+        self.interval = interval
+        self.last = {}
+
+    def __call__(self, path, rows, seconds, done):
+        if not done and seconds - self.last.get(path, 0) < self.interval:
+            return
+        self.last[path] = seconds
+        rate = rows / seconds if seconds > 0 else 0
+        status = "done" if done else "loading"
+        print(
+            f"{path}: {status}, {rows:,} rows in {seconds:.1f}s ({rate:,.0f} rows/s)",
+            file=self.file,
+        )
@@ -0,0 +1,189 @@
+from bisect import bisect_left, insort
+
+
+class NameIndex():
+    """
+    Sorted index over lowercase names, supporting exact, prefix and
+    bounded-edit-distance lookups.
+
+    Fuzzy matching walks the sorted names as if they were a trie: the edit
+    distance rows of the prefix a name shares with the previous one are
+    reused, and once every entry of a row exceeds the allowed distance, all
+    names sharing that prefix are skipped with a binary search.
+    """
+
+    def __init__(self, names):
+        # Maps lowercase names to sets of person ids, shared with the caller
+        self.names = names
+        self.keys = sorted(names)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, name):
+        """
+        Adds a name to the index once it is present in `names`.
+        """
+        name = name.lower()
+        i = bisect_left(self.keys, name)
+        if i == len(self.keys) or self.keys[i] != name:
+            insort(self.keys, name)
+
+    def lookup(self, name):
+        """
+        Returns the set of person ids with exactly this name.
+        """
+        return self.names.get(name.lower(), set())
+
+    def prefix(self, prefix, limit=None):
+        """
+        Returns the names starting with `prefix`, in sorted order.
+        """
+        prefix = prefix.lower()
+        start = bisect_left(self.keys, prefix)
+        end = bisect_left(self.keys, _successor(prefix), start) if prefix else len(self.keys)
+        if limit is not None:
+            end = min(end, start + limit)
+        return self.keys[start:end]
+
+    def fuzzy(self, name, max_distance=1, limit=None):
+        """
+        Returns (distance, name) pairs for every name within `max_distance`
+        edits (insertions, deletions, substitutions) of `name`, closest first.
+        """
+        query = name.lower()
+        keys = self.keys
+
+        # rows[j] holds the edit distances of query prefixes against the first
+        # j characters of `previous`
+        rows = [list(range(len(query) + 1))]
+        previous = ""
+        matches = []
+
+        i = 0
+        while i < len(keys):
+            key = keys[i]
+            common = min(_common_prefix_length(previous, key), len(rows) - 1)
+            del rows[common + 1 :]
+
+            pruned = None
+            for depth in range(common, len(key)):
+                row = _next_row(rows[-1], key[depth], query)
+                rows.append(row)
+                if min(row) > max_distance:
+                    pruned = depth + 1
+                    break
+
+            if pruned is None:
+                if rows[-1][-1] <= max_distance:
+                    matches.append((rows[-1][-1], key))
+                previous = key
+                i += 1
+            else:
+                # No name starting with this prefix can be close enough
+                previous = key[:pruned]
+                i = max(i + 1, bisect_left(keys, _successor(previous), i + 1))
+
+        matches.sort()
+        return matches if limit is None else matches[:limit]
+
+
+class SortedNames():
+    """
+    Maps lowercase names to sets of person ids, like the `names` dict, by
+    binary search over `order`: person indices sorted by lowercase name.
+    Names changed afterwards are kept in a dict.
+    """
+
+    def __init__(self, person_names, person_ids, order):
+        self.person_names = person_names
+        self.person_ids = person_ids
+        self.order = order
+        self.changed = {}
+
+    def _name(self, p):
+        return self.person_names[p].lower()
+
+    def _stored(self, name):
+        """
+        Returns the set of person ids with lowercase `name` in `order`.
+        """
+        order = self.order
+        i = bisect_left(order, name, key=self._name)
+        person_ids = set()
+        while i < len(order) and self._name(order[i]) == name:
+            person_ids.add(self.person_ids[order[i]])
+            i += 1
+        return person_ids
+
+    def get(self, name, default=None):
+        if name in self.changed:
+            return self.changed[name]
+        return self._stored(name) or default
+
+    def __getitem__(self, name):
+        person_ids = self.get(name)
+        if person_ids is None:
+            raise KeyError(name)
+        return person_ids
+
+    def __contains__(self, name):
+        return self.get(name) is not None
+
+    def __setitem__(self, name, person_ids):
+        self.changed[name] = person_ids
+
+    def setdefault(self, name, default=None):
+        if name not in self.changed:
+            self.changed[name] = self._stored(name) or default
+        return self.changed[name]
+
+    def __iter__(self):
+        previous = None
+        for p in self.order:
+            name = self._name(p)
+            if name != previous and name not in self.changed:
+                yield name
+            previous = name
+        yield from self.changed
+
+    def clear(self):
+        self.order = ()
+        self.changed.clear()
+
+
+def _next_row(row, character, query):
+    """
+    Returns the edit distance row after appending `character` to the name
+    prefix whose row is `row`.
+    """
+    next_row = [row[0] + 1]
+    for j, query_character in enumerate(query, start=1):
+        next_row.append(
+            min(
+                next_row[j - 1] + 1,
+                row[j] + 1,
+                row[j - 1] + (query_character != character),
+            )
+        )
+    return next_row
+
+
+def _common_prefix_length(a, b):
+    length = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        length += 1
+    return length
+
+
+def _successor(prefix):
+    """
+    Returns the smallest string greater than every string starting with
+    `prefix`.
+    """
+    last = ord(prefix[-1])
+    if last == 0x10FFFF:
+        return prefix + chr(last)
+    return prefix[:-1] + chr(last + 1)
@@ -0,0 +1,220 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import time
+import traceback
+
+from bisect import bisect_left
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import degrees
+
+# Upper bounds, in milliseconds, of the latency histogram buckets
+LATENCY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    500: "Internal Server Error",
+}
+
+
+class QueryService():
+    """
+    Answers shortest path queries against the data already loaded into the
+    degrees module, with an LRU cache of recent answers and latency
+    statistics.
+
+    Searches run in a process pool so the event loop stays responsive; the
+    workers are forked where possible, sharing the loaded graph
+    copy-on-write.
+    """
+
+    def __init__(self, workers=1, cache_size=1024):
+        context, initializer, initargs = degrees.worker_context()
+        self.executor = ProcessPoolExecutor(
+            workers, mp_context=context, initializer=initializer, initargs=initargs
+        )
+
+        # Start the workers now, as forking from inside a running event loop
+        # can leave a child deadlocked
+        for future in [self.executor.submit(int) for _ in range(workers)]:
+            future.result()
+
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+
+        # One count per bucket in LATENCY_BUCKETS, plus one for slower queries
+        self.latencies = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.requests = 0
+        self.total_seconds = 0.0
+
+    async def path(self, source, target, options):
+        """
+        Returns the answer to a query as produced by degrees.answer_query,
+        from the cache if it was asked recently.
+        """
+        key = (source.lower(), target.lower(), tuple(sorted(options.items())))
+        if key in self.cache:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return self.cache[key]
+
+        self.misses += 1
+        loop = asyncio.get_running_loop()
+        answer = await loop.run_in_executor(
+            self.executor, degrees.answer_query, (source, target, options)
+        )
+
+        self.cache[key] = answer
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return answer
+
+    def record(self, seconds):
+        """
+        Adds a request's latency to the histogram.
+        """
+        self.requests += 1
+        self.total_seconds += seconds
+        self.latencies[bisect_left(LATENCY_BUCKETS, seconds * 1000)] += 1
+
+    def stats(self):
+        """
+        Returns a dictionary of request, cache and latency statistics.
+        """
+        buckets = {f"<={bound}ms": count for bound, count in zip(LATENCY_BUCKETS, self.latencies)}
+        buckets[f">{LATENCY_BUCKETS[-1]}ms"] = self.latencies[-1]
+        return {
+            "requests": self.requests,
+            "mean_ms": 1000 * self.total_seconds / self.requests if self.requests else None,
+            "latency": buckets,
+            "cache": {"size": len(self.cache), "hits": self.hits, "misses": self.misses},
+        }
+
+    async def route(self, method, target):
+        """
+        Returns the (status, body) response for a request.
+        """
+        if method != "GET":
+            return 405, {"error": "Only GET is supported."}
+
+        url = urlsplit(target)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+
+        if url.path == "/path":
+            if "source" not in query or "target" not in query:
+                return 400, {"error": "source and target are required."}
+            try:
+                options = {
+                    "bidirectional": query.get("bidirectional", "0") in ("1", "true"),
+                    "policy": query.get("policy", "none"),
+                    "max_distance": int(query.get("fuzzy", 0)),
+                }
+            except ValueError:
+                return 400, {"error": "fuzzy must be an integer."}
+            if options["policy"] not in degrees.POLICIES or options["policy"] == "ask":
+                return 400, {"error": "Unknown policy."}
+            return 200, await self.path(query["source"], query["target"], options)
+        elif url.path == "/stats":
+            return 200, self.stats()
+        elif url.path == "/health":
+            return 200, {"status": "ok"}
+
+        return 404, {"error": "Not found."}
+
+    async def handle(self, reader, writer):
+        """
+        Serves one HTTP/1.1 request on a connection, then closes it. A request
+        that fails while being answered gets a 500 response, and the error is
+        printed to stderr.
+        """
+        start = time.perf_counter()
+        try:
+            try:
+                request_line = (await reader.readline()).decode("latin-1")
+
+                # Headers are read and ignored; requests have no body
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+
+                method, target, _ = request_line.split(" ", 2)
+            except ValueError:
+                status, body = 400, {"error": "Malformed request."}
+            else:
+                status, body = await self.route(method, target)
+        except Exception:
+            traceback.print_exc()
+            status, body = 500, {"error": "Internal server error."}
+
+        try:
+            payload = json.dumps(body).encode("utf-8")
+            writer.write(
+                (
+                    f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                    "Content-Type: application/json\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    "Connection: close\r\n\r\n"
+                ).encode("latin-1")
+                + payload
+            )
+            await writer.drain()
+        finally:
+            writer.close()
+        self.record(time.perf_counter() - start)
+
+    def close(self):
+        self.executor.shutdown()
+
+
+async def serve(service, host="127.0.0.1", port=8050):
+    """
+    Starts serving `service` over HTTP, returning the asyncio server.
+    """
+    return await asyncio.start_server(service.handle, host, port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve degrees of separation over HTTP.")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8050)
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--cache-size", type=int, default=1024)
+    parser.add_argument("--compact", action="store_true")
+    parser.add_argument("--adjacency", action="store_true")
+    parser.add_argument("--components", action="store_true")
+    args = parser.parse_args()
+
+    print("Loading data...")
+    degrees.load_data(args.directory, compact=args.compact, adjacency=args.adjacency)
+    if args.components:
+        degrees.build_components()
+    print("Data loaded.")
+
+    # Fork the workers only once the data is loaded
+    service = QueryService(args.workers, args.cache_size)
+
+    async def run():
+        server = await serve(service, args.host, args.port)
+        print(f"Serving on http://{args.host}:{args.port}")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+import json
+import mmap
+import os
+import struct
+import sys
+
+from array import array
+
+from graph import CompactGraph, SortedIndex
+
+# Bump whenever the layout below changes, so stale snapshots are rebuilt
+VERSION = 2
+
+MAGIC = b"DEGSNAP\0"
+PREAMBLE = struct.Struct("<8sII")
+FILENAME = "degrees.snapshot"
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+
+# CompactGraph attributes stored as raw integer arrays and as string tables
+ARRAYS = ("person_offsets", "person_movies", "movie_offsets", "movie_stars")
+ADJACENCY = ("costar_offsets", "costars", "costar_movies")
+
+# Sorted lookup tables: person and movie indices by IMDB id, and person
+# indices by lowercase name
+ORDERS = ("person_order", "movie_order", "name_order")
+STRINGS = (
+    "person_ids",
+    "person_names",
+    "person_births",
+    "movie_ids",
+    "movie_titles",
+    "movie_years",
+)
+
+
+def snapshot_path(directory):
+    """
+    Returns the path of the snapshot file for a data directory.
+    """
+    return os.path.join(directory, FILENAME)
+
+
+def source_key(directory):
+    """
+    Returns the size and modification time of each CSV file, which a
+    snapshot must match to be reused.
+    """
+    key = {}
+    for name in SOURCES:
+        stat = os.stat(os.path.join(directory, name))
+        key[name] = [stat.st_size, stat.st_mtime_ns]
+    return key
+
+
+def save(graph, directory, sources):
+    """
+    Writes `graph` to the snapshot file for `directory`. `sources` is the
+    source_key the graph was read from, taken before reading it, so that a
+    CSV file rewritten meanwhile makes the snapshot stale.
+
+    The file is a fixed preamble (magic, version, header length), a JSON
+    header describing each section, then the sections themselves: integer
+    arrays as raw native-endian bytes and string tables as NUL-separated
+    UTF-8, each aligned to 8 bytes. The arrays include the ORDERS tables,
+    sorted here so that loading does not have to build lookup dicts.
+    """
+    sections = []
+    for name in ARRAYS + ADJACENCY:
+        if getattr(graph, name) is not None:
+            sections.append((name, "array", getattr(graph, name).tobytes()))
+    orders = (
+        graph.person_ids,
+        graph.movie_ids,
+        [name.lower() for name in graph.person_names],
+    )
+    for name, keys in zip(ORDERS, orders):
+        order = array("i", sorted(range(len(keys)), key=keys.__getitem__))
+        sections.append((name, "array", order.tobytes()))
+    for name in STRINGS:
+        sections.append((name, "strings", "\0".join(getattr(graph, name)).encode("utf-8")))
+
+    # Lay out sections relative to the end of the header
+    layout = {}
+    offset = 0
+    for name, kind, data in sections:
+        layout[name] = [kind, offset, len(data)]
+        offset += _padded(len(data))
+
+    header = json.dumps(
+        {
+            "sources": sources,
+            "byteorder": sys.byteorder,
+            "itemsize": array("i").itemsize,
+            "sections": layout,
+        }
+    ).encode("utf-8")
+    header += b" " * (_padded(PREAMBLE.size + len(header)) - PREAMBLE.size - len(header))
+
+    # Write to a temporary file first so readers never see a partial snapshot
+    path = snapshot_path(directory)
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(PREAMBLE.pack(MAGIC, VERSION, len(header)))
+        f.write(header)
+        for name, kind, data in sections:
+            f.write(data)
+            f.write(b"\0" * (_padded(len(data)) - len(data)))
+    os.replace(temporary, path)
+
+
+def load(directory):
+    """
+    Returns a CompactGraph memory-mapped from the snapshot for `directory`,
+    or None if there is no snapshot or it is stale or incompatible.
+    """
+    path = snapshot_path(directory)
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return None
+
+    with f:
+        preamble = f.read(PREAMBLE.size)
+        if len(preamble) != PREAMBLE.size:
+            return None
+        magic, version, header_length = PREAMBLE.unpack(preamble)
+        if magic != MAGIC or version != VERSION:
+            return None
+
+        header = json.loads(f.read(header_length))
+        if (
+            header["sources"] != source_key(directory)
+            or header["byteorder"] != sys.byteorder
+            or header["itemsize"] != array("i").itemsize
+        ):
+            return None
+
+        # The mapping stays alive for as long as the views into it do
+        data = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    base = PREAMBLE.size + header_length
+    graph = CompactGraph()
+    orders = {}
+    for name, (kind, offset, length) in header["sections"].items():
+        section = data[base + offset : base + offset + length]
+        if kind == "array" and name in ORDERS:
+            orders[name] = section.cast("i")
+        elif kind == "array":
+            setattr(graph, name, section.cast("i"))
+        else:
+            text = str(section, "utf-8")
+            setattr(graph, name, text.split("\0") if text else [])
+
+    # Ids and names are looked up by binary search rather than through dicts
+    graph.person_index = SortedIndex(graph.person_ids, orders["person_order"])
+    graph.movie_index = SortedIndex(graph.movie_ids, orders["movie_order"])
+    graph.name_order = orders["name_order"]
+    return graph
+
+
+def load_or_build(directory, adjacency=False, progress=None):
+    """
+    Returns a CompactGraph for `directory`, reusing its snapshot when it is
+    up to date and otherwise parsing the CSV files and writing a new one.
+
+    If `adjacency` is True, the co-star adjacency index is built too, and
+    the snapshot is rewritten if it did not already include it. Otherwise a
+    stored index is left unused, since it changes the co-stars that
+    neighbors_for_person returns. `progress` is passed on to
+    CompactGraph.from_csv.
+    """
+    sources = source_key(directory)
+    graph = load(directory)
+    if graph is not None and not adjacency:
+        graph.costar_offsets = graph.costars = graph.costar_movies = None
+        return graph
+    if graph is not None and graph.costar_offsets is not None:
+        return graph
+
+    if graph is None:
+        graph = CompactGraph.from_csv(directory, progress=progress)
+    if adjacency:
+        graph.build_adjacency()
+    try:
+        save(graph, directory, sources)
+    except OSError:
+        # A read-only data directory just means no snapshot next time
+        pass
+    return graph
+
+
+def _padded(length):
+    return (length + 7) // 8 * 8
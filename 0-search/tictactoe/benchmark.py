@@ -0,0 +1,167 @@
+import argparse
+import json
+import random
+import sys
+import time
+
+import tictactoe as ttt
+
+MATCHES = ("ai-vs-ai", "ai-vs-random")
+
+
+def percentile(values, p):
+    """
+    Returns the p-th percentile of `values` by the nearest-rank method, or
+    None if there are none.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * p // 100))
+    return ordered[rank - 1]
+
+
+def rate(hits, misses):
+    return hits / (hits + misses) if hits + misses else None
+
+
+def play(ai_players):
+    """
+    Plays one game in which the players in `ai_players` move by minimax
+    and the others move at random. Returns the winner, or None for a tie,
+    and the seconds taken by each AI move.
+    """
+    board = ttt.initial_state()
+    latencies = []
+    while not ttt.terminal(board):
+        if ttt.player(board) in ai_players:
+            start = time.perf_counter()
+            action = ttt.minimax(board)
+            latencies.append(time.perf_counter() - start)
+        else:
+            action = random.choice(sorted(ttt.actions(board)))
+        board = ttt.result(board, action)
+    return ttt.winner(board), latencies
+
+
+def run_match(match, games, clear=False):
+    """
+    Plays `games` games of a match and returns its statistics. In
+    ai-vs-random the AI alternates between X and O. If `clear` is True the
+    caches are emptied before every game, so each one is searched cold.
+    """
+    for key in ttt.stats:
+        ttt.stats[key] = 0
+    table = ttt.transposition_table
+    table_hits, table_misses = 0, 0
+
+    outcomes = {"X": 0, "O": 0, "tie": 0}
+    if match == "ai-vs-random":
+        outcomes.update({"ai": 0, "random": 0})
+    latencies = []
+    start = time.perf_counter()
+    for game in range(games):
+        if clear:
+            ttt.board_cache.clear()
+            table.clear()
+        hits, misses = table.hits, table.misses
+
+        if match == "ai-vs-ai":
+            ai_players = {ttt.X, ttt.O}
+        else:
+            ai_players = {ttt.X if game % 2 == 0 else ttt.O}
+        winner, times = play(ai_players)
+        latencies.extend(times)
+        table_hits += table.hits - hits
+        table_misses += table.misses - misses
+
+        outcomes["tie" if winner is None else winner] += 1
+        if match == "ai-vs-random" and winner is not None:
+            outcomes["ai" if winner in ai_players else "random"] += 1
+
+    seconds = time.perf_counter() - start
+    milliseconds = [1000 * latency for latency in latencies]
+    hits, misses = ttt.stats["cache_hits"], ttt.stats["cache_misses"]
+    return {
+        "games": games,
+        "seconds": seconds,
+        "outcomes": outcomes,
+        "ai_moves": len(latencies),
+        "nodes": ttt.stats["nodes"],
+        "nodes_per_move": ttt.stats["nodes"] / len(latencies) if latencies else None,
+        "latency_ms": {
+            "mean": sum(milliseconds) / len(milliseconds) if milliseconds else None,
+            "p50": percentile(milliseconds, 50),
+            "p90": percentile(milliseconds, 90),
+            "p99": percentile(milliseconds, 99),
+            "max": max(milliseconds, default=None),
+        },
+        "board_cache": {
+            "size": len(ttt.board_cache),
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": rate(hits, misses),
+        },
+        "transposition_table": {
+            "size": len(table),
+            "hits": table_hits,
+            "misses": table_misses,
+            "hit_rate": rate(table_hits, table_misses),
+        },
+    }
+
+
+def benchmark(games=100, matches=MATCHES, book=True, clear=False, seed=None):
+    """
+    Returns a report of `games` games of each match, searching without the
+    opening book if `book` is False.
+    """
+    random.seed(seed)
+    opening_book = ttt.opening_book
+    if not book:
+        ttt.opening_book = None
+
+    try:
+        ttt.board_cache.clear()
+        ttt.transposition_table.clear()
+        report = {
+            "config": {
+                "games": games,
+                "book": ttt.opening_book is not None,
+                "clear": clear,
+                "seed": seed,
+            },
+            "matches": {match: run_match(match, games, clear) for match in matches},
+        }
+    finally:
+        ttt.opening_book = opening_book
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the tictactoe AI by self-play.")
+    parser.add_argument("--games", type=int, default=100, help="games per match")
+    parser.add_argument("--match", choices=MATCHES, action="append", help="default: all")
+    parser.add_argument("--no-book", action="store_true", help="search without the opening book")
+    parser.add_argument("--clear", action="store_true", help="empty the caches before every game")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    report = benchmark(
+        args.games,
+        matches=args.match or MATCHES,
+        book=not args.no_book,
+        clear=args.clear,
+        seed=args.seed,
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Bitboard Tic Tac Toe engine
+
+Each side is a 9-bit integer, with bit 3 * i + j set if that side has played
+cell (i, j). Winning lines are precomputed masks, and a 512-entry table says
+whether a set of cells contains one. The functions at the bottom adapt this
+to the list-of-lists boards used by tictactoe.py and runner.py.
+"""
+
+import random
+
+X = "X"
+O = "O"
+EMPTY = None
+
+FULL = 0b111111111
+
+# Rows, columns and both diagonals
+LINES = (
+    0b000000111,
+    0b000111000,
+    0b111000000,
+    0b001001001,
+    0b010010010,
+    0b100100100,
+    0b100010001,
+    0b001010100,
+)
+
+# WON[bits] is True if the cells in `bits` contain a complete line
+WON = [any(bits & line == line for line in LINES) for bits in range(FULL + 1)]
+
+
+def moves(x, o):
+    """
+    Returns the single-bit masks of every empty cell.
+    """
+    empty = FULL & ~(x | o)
+    found = []
+    while empty:
+        move = empty & -empty
+        found.append(move)
+        empty ^= move
+    return found
+
+
+def negamax(me, them, alpha=-1, beta=1):
+    """
+    Returns the value of a position for the side to move, whose cells are
+    `me`: 1 for a forced win, -1 for a forced loss, 0 for a draw.
+
+    Uses alpha-beta pruning within the window (alpha, beta).
+    """
+    if WON[them]:
+        return -1
+    empty = FULL & ~(me | them)
+    if not empty:
+        return 0
+
+    best = -1
+    while empty:
+        move = empty & -empty
+        empty ^= move
+        value = -negamax(them, me | move, -beta, -alpha)
+        if value > best:
+            best = value
+            if best > alpha:
+                alpha = best
+                if alpha >= beta:
+                    break
+    return best
+
+
+def best_move(x, o):
+    """
+    Returns the single-bit mask of an optimal move for the side to move, or
+    None if the game is over. Moves are tried in random order so that the
+    AI varies between equally good moves.
+    """
+    if WON[x] or WON[o] or (x | o) == FULL:
+        return None
+
+    me, them = (x, o) if x.bit_count() == o.bit_count() else (o, x)
+    candidates = moves(x, o)
+    random.shuffle(candidates)
+
+    best, best_value, alpha = None, -2, -1
+    for move in candidates:
+        value = -negamax(them, me | move, -1, -alpha)
+        if value > best_value:
+            best, best_value = move, value
+            alpha = max(alpha, value)
+            if value == 1:
+                break
+    return best
+
+
+def to_bits(board):
+    """
+    Returns the (x, o) bitboards of a list-of-lists board.
+    """
+    x, o = 0, 0
+    for i in range(3):
+        for j in range(3):
+            if board[i][j] == X:
+                x |= 1 << (3 * i + j)
+            elif board[i][j] == O:
+                o |= 1 << (3 * i + j)
+    return x, o
+
+
+def to_board(x, o):
+    """
+    Returns the list-of-lists board of (x, o) bitboards.
+    """
+    return [
+        [
+            X if x >> (3 * i + j) & 1 else O if o >> (3 * i + j) & 1 else EMPTY
+            for j in range(3)
+        ]
+        for i in range(3)
+    ]
+
+
+def to_action(move):
+    """
+    Returns the (i, j) cell of a single-bit move mask.
+    """
+    return divmod(move.bit_length() - 1, 3)
+
+
+def initial_state():
+    """
+    Returns starting state of the board.
+    """
+    return [[EMPTY, EMPTY, EMPTY], [EMPTY, EMPTY, EMPTY], [EMPTY, EMPTY, EMPTY]]
+
+
+def player(board):
+    """
+    Returns player who has the next turn on a board.
+    """
+    x, o = to_bits(board)
+    return X if x.bit_count() == o.bit_count() else O
+
+
+def actions(board):
+    """
+    Returns set of all possible actions (i, j) available on the board.
+    """
+    return {to_action(move) for move in moves(*to_bits(board))}
+
+
+def result(board, action):
+    """
+    Returns the board that results from making move (i, j) on the board.
+    """
+    i, j = action
+    if i < 0 or i > 2 or j < 0 or j > 2 or board[i][j] != EMPTY:
+        raise Exception(f"action {action} is invalid")
+
+    board_copy = [row[:] for row in board]
+    board_copy[i][j] = player(board)
+    return board_copy
+
+
+def winner(board):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    x, o = to_bits(board)
+    if WON[x]:
+        return X
+    if WON[o]:
+        return O
+    return None
+
+
+def terminal(board):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    x, o = to_bits(board)
+    return WON[x] or WON[o] or (x | o) == FULL
+
+
+def utility(board):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    x, o = to_bits(board)
+    if WON[x]:
+        return 1
+    if WON[o]:
+        return -1
+    return 0
+
+
+def minimax(board):
+    """
+    Returns the optimal action for the current player on the board.
+    """
+    move = best_move(*to_bits(board))
+    return None if move is None else to_action(move)
@@ -0,0 +1,122 @@
+"""
+Opening book for Tic Tac Toe
+
+Every position reachable from the empty board is solved exhaustively, and
+the set of optimal moves for each is stored as a 9-bit mask in a dense
+array indexed by the position's base-3 encoding. Run this file to rebuild
+book.bin.
+"""
+
+import os
+import sys
+
+from array import array
+
+import bitboard
+
+MAGIC = b"TTTBOOK1"
+PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "book.bin")
+
+# Number of possible boards, one base-3 digit per cell
+SIZE = 3 ** 9
+
+# Base-3 digit of each cell value
+DIGITS = {None: 0, "X": 1, "O": 2}
+
+
+def encode(board):
+    """
+    Returns the base-3 encoding of a board, with cell (0, 0) most significant.
+    """
+    key = 0
+    for row in board:
+        for cell in row:
+            key = key * 3 + DIGITS[cell]
+    return key
+
+
+def encode_bits(x, o):
+    """
+    Returns the base-3 encoding of (x, o) bitboards, matching encode.
+    """
+    key = 0
+    for k in range(9):
+        key = key * 3 + (1 if x >> k & 1 else 2 if o >> k & 1 else 0)
+    return key
+
+
+def build():
+    """
+    Returns the book: an array with, for every reachable non-terminal
+    position, the mask of cells (bit 3 * i + j) where moving is optimal.
+    """
+    book = array("H", [0]) * SIZE
+    seen = set()
+    stack = [(0, 0)]
+    while stack:
+        x, o = stack.pop()
+        if (x, o) in seen or bitboard.WON[x] or bitboard.WON[o] or (x | o) == bitboard.FULL:
+            continue
+        seen.add((x, o))
+
+        me, them = (x, o) if x.bit_count() == o.bit_count() else (o, x)
+        children = []
+        for move in bitboard.moves(x, o):
+            value = -bitboard.negamax(them, me | move)
+            children.append((value, move))
+            stack.append((x | move, o) if me == x else (x, o | move))
+
+        best = max(value for value, _ in children)
+        mask = 0
+        for value, move in children:
+            if value == best:
+                mask |= move
+        book[encode_bits(x, o)] = mask
+
+    return book
+
+
+def save(book, path=PATH):
+    """
+    Writes a book to `path` as a magic header and little-endian masks.
+    """
+    data = array("H", book)
+    if sys.byteorder != "little":
+        data.byteswap()
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(data.tobytes())
+
+
+def load(path=PATH):
+    """
+    Returns the book stored at `path`, or None if it is missing or invalid.
+    """
+    try:
+        with open(path, "rb") as f:
+            contents = f.read()
+    except FileNotFoundError:
+        return None
+    if not contents.startswith(MAGIC) or len(contents) != len(MAGIC) + 2 * SIZE:
+        return None
+
+    book = array("H")
+    book.frombytes(contents[len(MAGIC) :])
+    if sys.byteorder != "little":
+        book.byteswap()
+    return book
+
+
+def optimal_actions(book, board):
+    """
+    Returns the list of optimal (i, j) actions for a board from the book,
+    which is empty for terminal or unreachable boards.
+    """
+    mask = book[encode(board)]
+    return [divmod(k, 3) for k in range(9) if mask >> k & 1]
+
+
+if __name__ == "__main__":
+    book = build()
+    save(book)
+    print(f"Wrote {sum(1 for mask in book if mask)} positions to {PATH}")
@@ -0,0 +1,412 @@
+"""
+m,n,k game engine
+
+Generalises Tic Tac Toe to boards of any number of rows and columns where k
+in a row wins, e.g. 4x4 with k = 3 or 15x15 gomoku with k = 5. An MNKGame
+has the same functions as tictactoe.py, so it can be used in its place by
+runner.py.
+
+Boards are held internally as one bitmask per side, with bit i * cols + j
+set for cell (i, j). The search is negamax with alpha-beta pruning and a
+transposition table, deepened one ply at a time until the time budget runs
+out. Positions the search cannot finish are scored by counting, for every
+window of k cells, how many stones one side has in it when the other side
+has none.
+"""
+
+import random
+import time
+
+from transposition import TranspositionTable
+
+X = "X"
+O = "O"
+EMPTY = None
+
+# Score of a won position, before adding the number of empty cells left so
+# that faster wins score higher
+WIN = 1000000
+
+# Boards with more cells than this only consider moves near existing stones
+SMALL_BOARD = 25
+
+# Transposition table entry types
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# How many nodes to search between checks of the clock
+CLOCK_INTERVAL = 512
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class MNKGame():
+    """
+    An m,n,k game with `rows` x `cols` cells and `k` in a row to win.
+
+    minimax searches for at most `time_limit` seconds and `max_depth` plies
+    (None for no limit). `radius` is how far from an existing stone a move
+    may be considered, or None to consider every empty cell; by default
+    only boards larger than SMALL_BOARD cells are restricted, to radius 1.
+    """
+
+    X = X
+    O = O
+    EMPTY = EMPTY
+
+    def __init__(self, rows=3, cols=3, k=3, time_limit=1.0, max_depth=None,
+                 radius=None, table_size=1 << 20):
+        if k > max(rows, cols):
+            raise Exception(f"k = {k} does not fit on a {rows}x{cols} board")
+
+        self.rows = rows
+        self.cols = cols
+        self.k = k
+        self.size = rows * cols
+        self.full = (1 << self.size) - 1
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        if radius is None and self.size > SMALL_BOARD:
+            radius = 1
+        self.radius = radius
+
+        # Every line of k cells, as a mask, and the lines through each cell
+        self.windows = []
+        for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+            for i in range(rows):
+                for j in range(cols):
+                    end_i, end_j = i + di * (k - 1), j + dj * (k - 1)
+                    if not (0 <= end_i < rows and 0 <= end_j < cols):
+                        continue
+                    window = 0
+                    for step in range(k):
+                        window |= 1 << ((i + di * step) * cols + j + dj * step)
+                    self.windows.append(window)
+        self.cell_windows = [
+            tuple(window for window in self.windows if window >> cell & 1)
+            for cell in range(self.size)
+        ]
+
+        # NEAR[cell] is the mask of cells within `radius` of cell
+        self.near = []
+        for cell in range(self.size):
+            i, j = divmod(cell, cols)
+            mask = 0
+            if radius is not None:
+                for ni in range(max(0, i - radius), min(rows, i + radius + 1)):
+                    for nj in range(max(0, j - radius), min(cols, j + radius + 1)):
+                        mask |= 1 << (ni * cols + nj)
+            self.near.append(mask)
+
+        # Value of a window holding `count` stones of one side only
+        self.weights = [0] + [4 ** count for count in range(1, k)]
+
+        self.center = (rows // 2) * cols + cols // 2
+        self.transposition_table = TranspositionTable(table_size)
+        self.nodes = 0
+        self.depth = 0
+        self.deadline = None
+
+    def initial_state(self):
+        """
+        Returns starting state of the board.
+        """
+        return [[EMPTY] * self.cols for _ in range(self.rows)]
+
+    def to_bits(self, board):
+        """
+        Returns the (x, o) bitmasks of a list-of-lists board.
+        """
+        x, o = 0, 0
+        for i, row in enumerate(board):
+            for j, cell in enumerate(row):
+                if cell == X:
+                    x |= 1 << (i * self.cols + j)
+                elif cell == O:
+                    o |= 1 << (i * self.cols + j)
+        return x, o
+
+    def player(self, board):
+        """
+        Returns player who has the next turn on a board.
+        """
+        x, o = self.to_bits(board)
+        return X if x.bit_count() == o.bit_count() else O
+
+    def actions(self, board):
+        """
+        Returns set of all possible actions (i, j) available on the board.
+        """
+        return {
+            (i, j)
+            for i in range(self.rows)
+            for j in range(self.cols)
+            if board[i][j] == EMPTY
+        }
+
+    def result(self, board, action):
+        """
+        Returns the board that results from making move (i, j) on the board.
+        """
+        i, j = action
+        if i < 0 or i >= self.rows or j < 0 or j >= self.cols or board[i][j] != EMPTY:
+            raise Exception(f"action {action} is invalid")
+
+        board_copy = [row[:] for row in board]
+        board_copy[i][j] = self.player(board)
+        return board_copy
+
+    def won(self, bits):
+        """
+        Returns True if the cells in `bits` contain k in a row.
+        """
+        return any(bits & window == window for window in self.windows)
+
+    def winner(self, board):
+        """
+        Returns the winner of the game, if there is one.
+        """
+        x, o = self.to_bits(board)
+        if self.won(x):
+            return X
+        if self.won(o):
+            return O
+        return None
+
+    def terminal(self, board):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        x, o = self.to_bits(board)
+        return self.won(x) or self.won(o) or (x | o) == self.full
+
+    def utility(self, board):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        x, o = self.to_bits(board)
+        if self.won(x):
+            return 1
+        if self.won(o):
+            return -1
+        return 0
+
+    def evaluate(self, me, them):
+        """
+        Returns the heuristic value of a position for the side whose cells
+        are `me`.
+        """
+        score = 0
+        for window in self.windows:
+            mine, theirs = me & window, them & window
+            if not theirs:
+                score += self.weights[mine.bit_count()]
+            elif not mine:
+                score -= self.weights[theirs.bit_count()]
+        return score
+
+    def gain(self, me, them, cell):
+        """
+        Returns (gain, wins) for the side whose cells are `me` playing
+        `cell`: the change in evaluate, and whether the move completes k in
+        a row.
+        """
+        gain, wins = 0, False
+        weights = self.weights
+        for window in self.cell_windows[cell]:
+            mine, theirs = me & window, them & window
+            if theirs:
+                if not mine:
+                    gain += weights[theirs.bit_count()]
+            else:
+                count = mine.bit_count() + 1
+                if count == self.k:
+                    wins = True
+                else:
+                    gain += weights[count] - weights[count - 1]
+        return gain, wins
+
+    def candidates(self, me, them, near):
+        """
+        Returns the cells worth playing: every empty cell, or on large boards
+        those in `near`.
+        """
+        empty = self.full & ~(me | them)
+        if self.radius is not None:
+            empty &= near
+        cells = []
+        while empty:
+            move = empty & -empty
+            cells.append(move.bit_length() - 1)
+            empty ^= move
+        return cells
+
+    def ordered(self, me, them, cells, first=None):
+        """
+        Returns (gain, wins, cell) for each cell, best first: `first` if
+        given, then by gain. The sort is stable, so equal cells keep the
+        order they were given in.
+        """
+        scored = []
+        for cell in cells:
+            gain, wins = self.gain(me, them, cell)
+            scored.append((wins, cell == first, gain, cell))
+        scored.sort(key=lambda score: score[:3], reverse=True)
+        return [(gain, wins, cell) for wins, _, gain, cell in scored]
+
+    def negamax(self, me, them, depth, alpha, beta, score, near, empty):
+        """
+        Returns the value of a position for the side to move, whose cells
+        are `me`, searched `depth` plies deep within the window
+        (alpha, beta). `score` is its heuristic value, `near` the cells near
+        a stone and `empty` the number of empty cells.
+        """
+        self.nodes += 1
+        if self.nodes % CLOCK_INTERVAL == 0 and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+
+        if empty == 0:
+            return 0
+        if depth == 0:
+            return score
+
+        original_alpha = alpha
+        key = (me, them)
+        entry = self.transposition_table.get(key)
+        first = None
+        if entry is not None:
+            entry_depth, value, kind, first = entry
+            if entry_depth >= depth:
+                if kind == EXACT:
+                    return value
+                if kind == LOWER:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+                if alpha >= beta:
+                    return value
+
+        best, best_cell = -2 * WIN, None
+        for gain, wins, cell in self.ordered(me, them, self.candidates(me, them, near), first):
+            if wins:
+                best, best_cell = WIN + empty, cell
+                break
+            move = 1 << cell
+            value = -self.negamax(
+                them, me | move, depth - 1, -beta, -alpha,
+                -(score + gain), near | self.near[cell], empty - 1,
+            )
+            if value > best:
+                best, best_cell = value, cell
+                if best > alpha:
+                    alpha = best
+                    if alpha >= beta:
+                        break
+
+        if best_cell is None:
+            return score
+
+        if best <= original_alpha:
+            kind = UPPER
+        elif best >= beta:
+            kind = LOWER
+        else:
+            kind = EXACT
+        self.transposition_table.put(key, (depth, best, kind, best_cell))
+        return best
+
+    def near_stones(self, stones):
+        """
+        Returns the mask of cells near any of `stones`.
+        """
+        near = 0
+        while stones:
+            move = stones & -stones
+            near |= self.near[move.bit_length() - 1]
+            stones ^= move
+        return near
+
+    def search_move(self, me, them, depth, gain, cell, alpha=-2 * WIN):
+        """
+        Returns the value for the side to move of playing `cell`, whose gain
+        is `gain`, searched `depth` plies deep. Values no better than `alpha`
+        are only upper bounds.
+        """
+        stones = me | them | 1 << cell
+        return -self.negamax(
+            them, me | 1 << cell, depth - 1, -2 * WIN, -alpha,
+            -(self.evaluate(me, them) + gain), self.near_stones(stones),
+            self.size - stones.bit_count(),
+        )
+
+    def search(self, me, them, depth, root):
+        """
+        Returns (value, cell) of the best of the `root` (gain, wins, cell)
+        moves for the side to move, searched `depth` plies deep, choosing
+        at random between equally good moves.
+        """
+        best, ties, alpha = -2 * WIN, [], -2 * WIN
+        for gain, wins, cell in root:
+            if wins:
+                return WIN + self.size - (me | them).bit_count(), cell
+            value = self.search_move(me, them, depth, gain, cell, alpha)
+            if value > best:
+                best, ties = value, [cell]
+
+                # Searching above one less than the best keeps the values of
+                # moves that tie with it exact
+                alpha = value - 1
+            elif value == best:
+                ties.append(cell)
+        return best, random.choice(ties)
+
+    def best_move(self, x, o, search=None):
+        """
+        Returns the cell of the best move found for the side to move within
+        the time budget, or None if the game is over.
+
+        Each depth is searched by `search`, which defaults to self.search
+        and may raise SearchTimeout once self.deadline has passed.
+        """
+        if search is None:
+            search = self.search
+
+        if self.won(x) or self.won(o) or (x | o) == self.full:
+            return None
+        if not (x | o) and self.radius is not None:
+            return self.center
+
+        me, them = (x, o) if x.bit_count() == o.bit_count() else (o, x)
+        empty = self.size - (x | o).bit_count()
+        max_depth = empty if self.max_depth is None else min(empty, self.max_depth)
+
+        # Shuffled before the stable sort so that equal moves vary
+        cells = self.candidates(me, them, self.near_stones(x | o))
+        random.shuffle(cells)
+        root = self.ordered(me, them, cells)
+
+        self.nodes = 0
+        self.depth = 0
+        self.deadline = time.perf_counter() + self.time_limit
+        best_cell = root[0][2]
+        for depth in range(1, max_depth + 1):
+            try:
+                value, cell = search(me, them, depth, root)
+            except SearchTimeout:
+                break
+            best_cell, self.depth = cell, depth
+
+            # Search the best move first next time
+            root.sort(key=lambda move: move[2] != best_cell)
+            if abs(value) > WIN:
+                break
+        return best_cell
+
+    def minimax(self, board):
+        """
+        Returns the optimal action for the current player on the board, as
+        far as can be searched within the time budget.
+        """
+        cell = self.best_move(*self.to_bits(board))
+        return None if cell is None else divmod(cell, self.cols)
@@ -0,0 +1,168 @@
+"""
+Parallel root-split minimax
+
+Searches the moves available at the root on a pool of worker processes.
+With no game, boards are solved by tictactoe.solve, and each worker sends
+back the transposition table values it stored so they are merged into
+tictactoe.transposition_table. With an mnk.MNKGame, every depth of the
+iterative deepening searches the first root move locally, then the rest in
+parallel against its value, as the serial search would; the workers keep
+their own tables between depths and send back the entries of the positions
+they were given.
+"""
+
+import multiprocessing
+import random
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+
+import mnk
+import tictactoe as ttt
+from transposition import canonical
+
+# Game searched by this worker process, if any
+_game = None
+
+
+def _initialise(game):
+    global _game
+    _game = game
+
+
+def _solve(board):
+    """
+    Returns (value, entries) for a tictactoe board: its minimax value, and
+    the transposition table entries stored while solving it.
+    """
+    known = set(ttt.transposition_table.entries)
+    value = ttt.solve(board)
+    entries = [
+        (key, entry)
+        for key, entry in ttt.transposition_table.entries.items()
+        if key not in known
+    ]
+    return value, entries
+
+
+def _search_move(me, them, depth, gain, cell, alpha, deadline):
+    """
+    Returns (value, entry, nodes) for one root move of an m,n,k game: its
+    value, or None if the wall clock passed `deadline`, the table entry of
+    the position it leads to, and the number of nodes searched.
+    """
+    _game.nodes = 0
+    _game.deadline = time.perf_counter() + deadline - time.time()
+    try:
+        value = _game.search_move(me, them, depth, gain, cell, alpha)
+    except mnk.SearchTimeout:
+        value = None
+    entry = _game.transposition_table.entries.get((them, me | 1 << cell))
+    return value, entry, _game.nodes
+
+
+class ParallelSearch():
+    """
+    Root-split minimax over `workers` processes, for tictactoe when `game`
+    is None or for an mnk.MNKGame. minimax returns an action as good as
+    the serial search's.
+    """
+
+    def __init__(self, game=None, workers=None):
+        if workers is None:
+            workers = multiprocessing.cpu_count()
+        if "fork" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("fork")
+        else:
+            context = multiprocessing.get_context()
+        self.game = game
+        self.executor = ProcessPoolExecutor(
+            workers, mp_context=context, initializer=_initialise, initargs=(game,)
+        )
+
+    def minimax(self, board):
+        """
+        Returns the optimal action for the current player on the board.
+        """
+        if self.game is None:
+            return self.solve(board)
+        cell = self.game.best_move(*self.game.to_bits(board), search=self.search)
+        return None if cell is None else divmod(cell, self.game.cols)
+
+    def solve(self, board):
+        """
+        Returns the optimal action for the current player on a tictactoe
+        board, solving the position after each action in parallel.
+        """
+        if ttt.terminal(board):
+            return None
+
+        # Once the position is known, helper chooses between its children
+        # from the table
+        key = canonical(board)
+        if ttt.transposition_table.get(key) is not None:
+            return ttt.helper(board)[1]
+
+        possible_actions = list(ttt.actions(board))
+        futures = [
+            self.executor.submit(_solve, ttt.result(board, action))
+            for action in possible_actions
+        ]
+
+        values = []
+        for future in futures:
+            value, entries = future.result()
+            for entry_key, entry in entries:
+                ttt.transposition_table.put(entry_key, entry)
+            values.append(value)
+
+        best_value = (max if ttt.player(board) == ttt.X else min)(values)
+        ttt.transposition_table.put(key, best_value)
+        return random.choice([
+            action
+            for action, value in zip(possible_actions, values)
+            if value == best_value
+        ])
+
+    def search(self, me, them, depth, root):
+        """
+        Returns (value, cell) of a best `root` move of an m,n,k game, as
+        MNKGame.search does, searching all but the first move in parallel.
+        """
+        game = self.game
+        gain, wins, cell = root[0]
+        if wins:
+            return mnk.WIN + game.size - (me | them).bit_count(), cell
+
+        best, ties = game.search_move(me, them, depth, gain, cell), [cell]
+
+        # The workers' clocks are not comparable with ours, so they are
+        # given the deadline in wall clock time. As in MNKGame.search, they
+        # search above one less than the best so that ties come back exact.
+        deadline = time.time() + game.deadline - time.perf_counter()
+        futures = [
+            self.executor.submit(_search_move, me, them, depth, gain, cell, best - 1, deadline)
+            for gain, _, cell in root[1:]
+        ]
+
+        timed_out = False
+        for (_, _, cell), future in zip(root[1:], futures):
+            if timed_out:
+                future.cancel()
+                continue
+            value, entry, nodes = future.result()
+            game.nodes += nodes
+            if entry is not None:
+                game.transposition_table.put((them, me | 1 << cell), entry)
+            if value is None:
+                timed_out = True
+            elif value > best:
+                best, ties = value, [cell]
+            elif value == best:
+                ties.append(cell)
+        if timed_out:
+            raise mnk.SearchTimeout()
+        return best, random.choice(ties)
+
+    def close(self):
+        self.executor.shutdown()
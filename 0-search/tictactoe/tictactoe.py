@@ -5,12 +5,29 @@ Tic Tac Toe Player
 import random
 import copy
 
+import book
+from transposition import TranspositionTable, canonical
+
 X = "X"
 O = "O"
 EMPTY = None
 
 board_cache = {}
 
+# Counters read by benchmark.py: boards searched by solve, and board_cache
+# lookups in winner
+stats = {"nodes": 0, "cache_hits": 0, "cache_misses": 0}
+
+# Maximum number of positions kept by the minimax transposition table. All
+# reachable positions fit in well under this, up to symmetry.
+TABLE_SIZE = 8192
+
+# Minimax values keyed by board up to symmetry
+transposition_table = TranspositionTable(TABLE_SIZE)
+
+# Optimal moves for every reachable board, if book.bin has been built
+opening_book = book.load()
+
 
 def initial_state():
     """
@@ -88,7 +105,9 @@ def winner(board):
     # Check cache for efficiency
     key = str(board)
     if key in board_cache:
+        stats["cache_hits"] += 1
         return board_cache[key]
+    stats["cache_misses"] += 1
 
     # Check columns
     for col in range(3):
@@ -197,44 +216,82 @@ def minimax(board):
     """
     Returns the optimal action for the current player on the board.
     """
+    # Every reachable position is in the opening book, when there is one
+    if opening_book is not None:
+        optimal = book.optimal_actions(opening_book, board)
+        if optimal:
+            return random.choice(optimal)
+
     _, best_action = helper(board)
     return best_action
 
 
 def helper(board):
     """
-    A helper function for the minimax function. Takes a board state
-    and returns the best action available by recursing until a winning
-    terminal state is found. The first action found that can result in
-    a win is returned.
+    A helper function for the minimax function. Takes a board state and
+    returns its (value, action) tuple, choosing the action at random among
+    all of those that keep the value.
+    """
+    value = solve(board)
+    if terminal(board):
+        return (value, None)
+
+    # Children are solved already, or pruned by a win and cheap to solve
+    optimal = [
+        action
+        for action in actions(board)
+        if solve(result(board, action)) == value
+    ]
+    return (value, random.choice(optimal))
+
+
+def solve(board):
+    """
+    Returns the minimax value of a board by recursing until a winning
+    terminal state is found.
+
+    Values are stored in the transposition table under the board's
+    canonical form, so each position is only searched once across all of
+    its rotations and reflections. Only the value is stored, not a move,
+    so that helper can choose between every optimal move each time.
     """
+    stats["nodes"] += 1
+
     # If our state is a terminal board, return its utility
     if terminal(board):
-        return (utility(board), None)
+        return utility(board)
 
+    key = canonical(board)
+    value = transposition_table.get(key)
+    if value is None:
+        value = search(board)
+        transposition_table.put(key, value)
+    return value
+
+
+def search(board):
+    """
+    Searches the actions on a non-terminal board, returning its value for
+    X. The search stops at the first action that wins for the player to
+    move.
+    """
     next_player = player(board)
 
-    # Value, Action tuple (-inf for X, +inf for O)
-    v = (float("-inf") if next_player == X else float("inf"), None)
+    # -inf for X, +inf for O
+    v = float("-inf") if next_player == X else float("inf")
 
     # Run the minimax algorithm on all available moves
-    possible_actions = list(actions(board))
-    random.shuffle(possible_actions)
-    for action in possible_actions:
+    for action in actions(board):
         if next_player == X:
-            temp = helper(result(board, action))
-            if v[0] < temp[0]:
-                v = (temp[0], action)
+            v = max(v, solve(result(board, action)))
 
             # Alpha-beta pruning, no need to consider other moves if we've
             # already found an ideal move.
-            if v[0] == 1:
+            if v == 1:
                 return v
         else:
-            temp = helper(result(board, action))
-            if v[0] > temp[0]:
-                v = (temp[0], action)
-            if v[0] == -1:
+            v = min(v, solve(result(board, action)))
+            if v == -1:
                 return v
 
     return v
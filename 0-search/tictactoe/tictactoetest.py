@@ -0,0 +1,296 @@
+import random
+import time
+
+import benchmark
+import bitboard
+import book
+import mnk
+import parallel
+import tictactoe as ttt
+import transposition
+
+
+def reachable(board=None, seen=None):
+    # Every board reachable from the initial state, keyed by its string form
+    if board is None:
+        board, seen = ttt.initial_state(), {}
+    key = str(board)
+    if key in seen:
+        return seen
+    seen[key] = board
+    if not ttt.terminal(board):
+        for action in ttt.actions(board):
+            reachable(ttt.result(board, action), seen)
+    return seen
+
+
+def value(board):
+    # Exact minimax value of a board for X
+    x, o = bitboard.to_bits(board)
+    if ttt.player(board) == ttt.X:
+        return bitboard.negamax(x, o)
+    return -bitboard.negamax(o, x)
+
+
+boards = list(reachable().values())
+random.seed(0)
+
+
+# BITBOARD ENGINE TESTS ==================================
+print("TEST - bitboard engine")
+print("test case 1", end="")
+
+assert len(boards) == 5478
+for board in boards:
+    assert bitboard.to_board(*bitboard.to_bits(board)) == board
+    assert bitboard.player(board) == ttt.player(board)
+    assert bitboard.actions(board) == ttt.actions(board)
+    assert bitboard.winner(board) == ttt.winner(board)
+    assert bitboard.terminal(board) == ttt.terminal(board)
+    assert bitboard.utility(board) == ttt.utility(board)
+    for action in ttt.actions(board):
+        assert bitboard.result(board, action) == ttt.result(board, action)
+
+print(" - PASS")
+
+print("test case 2", end="")
+
+# Values agree with the original search, and chosen moves keep the value
+for board in random.sample(boards, 200):
+    if ttt.terminal(board):
+        assert bitboard.minimax(board) is None
+        continue
+    assert value(board) == ttt.helper(board)[0]
+    action = bitboard.minimax(board)
+    assert value(bitboard.result(board, action)) == value(board)
+
+assert value(ttt.initial_state()) == 0
+
+print(" - PASS")
+
+
+# TRANSPOSITION TABLE TESTS ==================================
+print("TEST - transposition table")
+print("test case 1", end="")
+
+# Symmetric boards share a key, and different positions do not
+for board in random.sample(boards, 100):
+    key = transposition.canonical(board)
+    for permutation in transposition.SYMMETRIES:
+        cells = [cell for row in board for cell in row]
+        moved = [[cells[permutation[3 * i + j]] for j in range(3)] for i in range(3)]
+        assert transposition.canonical(moved) == key
+assert len({transposition.canonical(board) for board in boards}) == 765
+
+print(" - PASS")
+
+print("test case 2", end="")
+
+ttt.transposition_table.clear()
+ttt.opening_book = None
+for board in random.sample(boards, 300):
+    if ttt.terminal(board):
+        continue
+    action = ttt.minimax(board)
+    assert action in ttt.actions(board)
+    assert value(ttt.result(board, action)) == value(board)
+
+# The whole game is solved once, then the opening is a lookup
+ttt.minimax(ttt.initial_state())
+size, misses = len(ttt.transposition_table), ttt.transposition_table.misses
+assert size <= 765
+ttt.minimax(ttt.initial_state())
+assert len(ttt.transposition_table) == size
+assert ttt.transposition_table.misses == misses
+
+# Every optimal reply comes up, even once the table has seen the position
+board = ttt.result(ttt.initial_state(), (1, 1))
+replies = {ttt.minimax(board) for _ in range(40)}
+assert replies == {(0, 0), (0, 2), (2, 0), (2, 2)}
+
+print(" - PASS")
+
+print("test case 3", end="")
+
+table = transposition.TranspositionTable(max_size=2)
+table.put(1, "a")
+table.put(2, "b")
+assert table.get(1) == "a"
+table.put(3, "c")
+assert table.get(2) is None and table.get(1) == "a" and table.get(3) == "c"
+assert len(table) == 2 and table.hits == 3 and table.misses == 1
+
+print(" - PASS")
+
+
+# OPENING BOOK TESTS ==================================
+print("TEST - opening book")
+print("test case 1", end="")
+
+built = book.build()
+assert sum(1 for mask in built if mask) == sum(1 for board in boards if not ttt.terminal(board))
+for board in boards:
+    optimal = book.optimal_actions(built, board)
+    if ttt.terminal(board):
+        assert optimal == []
+        continue
+    expected = [
+        action
+        for action in sorted(ttt.actions(board))
+        if value(ttt.result(board, action)) == value(board)
+    ]
+    assert optimal == expected
+
+print(" - PASS")
+
+print("test case 2", end="")
+
+# The shipped book matches a fresh build, and minimax answers from it
+assert book.load() == built
+ttt.opening_book = built
+ttt.transposition_table.clear()
+for board in random.sample(boards, 100):
+    if not ttt.terminal(board):
+        assert ttt.minimax(board) in book.optimal_actions(built, board)
+assert len(ttt.transposition_table) == 0
+
+print(" - PASS")
+
+
+# MNK ENGINE TESTS ==================================
+print("TEST - mnk engine")
+print("test case 1", end="")
+
+# On 3x3 with k = 3 it agrees with tictactoe.py and plays perfectly
+game = mnk.MNKGame(3, 3, 3, time_limit=10)
+for board in boards:
+    assert game.player(board) == ttt.player(board)
+    assert game.actions(board) == ttt.actions(board)
+    assert game.winner(board) == ttt.winner(board)
+    assert game.terminal(board) == ttt.terminal(board)
+    assert game.utility(board) == ttt.utility(board)
+
+for board in random.sample(boards, 100):
+    if ttt.terminal(board):
+        assert game.minimax(board) is None
+        continue
+    action = game.minimax(board)
+    assert value(ttt.result(board, action)) == value(board)
+
+print(" - PASS")
+
+print("test case 2", end="")
+
+# Gomoku: win when four are in a row, otherwise block the opponent's four
+game = mnk.MNKGame(15, 15, 5, time_limit=0.5)
+board = game.initial_state()
+for j in range(4):
+    board[7][4 + j] = mnk.X
+    board[9][2 * j] = mnk.O
+assert game.minimax(board) in {(7, 3), (7, 8)}
+
+# An open four cannot be stopped, so the O at one end leaves one block
+board[9][0] = mnk.EMPTY
+board[7][3] = mnk.O
+board[10][10] = mnk.X
+assert game.player(board) == mnk.O
+assert game.minimax(board) == (7, 8)
+
+print(" - PASS")
+
+print("test case 3", end="")
+
+# The time budget is kept on a large open board
+game = mnk.MNKGame(15, 15, 5, time_limit=0.2)
+board = game.initial_state()
+for _ in range(6):
+    start = time.perf_counter()
+    board = game.result(board, game.minimax(board))
+    assert time.perf_counter() - start < 1
+assert game.depth >= 1 and not game.terminal(board)
+
+print(" - PASS")
+
+print("test case 4", end="")
+
+# Equally good replies vary, even once the table has seen the position
+game = mnk.MNKGame(3, 3, 3, time_limit=10)
+board = game.initial_state()
+board[1][1] = mnk.X
+replies = {game.minimax(board) for _ in range(40)}
+assert replies == {(0, 0), (0, 2), (2, 0), (2, 2)}
+
+print(" - PASS")
+
+
+# PARALLEL SEARCH TESTS ==================================
+print("TEST - parallel search")
+print("test case 1", end="")
+
+# Root-split tictactoe finds optimal moves and fills the shared table
+ttt.transposition_table.clear()
+search = parallel.ParallelSearch(workers=2)
+for board in random.sample(boards, 50):
+    if ttt.terminal(board):
+        assert search.minimax(board) is None
+        continue
+    action = search.minimax(board)
+    assert value(ttt.result(board, action)) == value(board)
+assert len(ttt.transposition_table) > 0
+search.close()
+
+print(" - PASS")
+
+print("test case 2", end="")
+
+# Root-split m,n,k search plays as well as the serial search
+game = mnk.MNKGame(3, 3, 3, time_limit=10)
+search = parallel.ParallelSearch(game, workers=2)
+for board in random.sample(boards, 50):
+    if not ttt.terminal(board):
+        action = search.minimax(board)
+        assert value(ttt.result(board, action)) == value(board)
+search.close()
+
+game = mnk.MNKGame(15, 15, 5, time_limit=0.5)
+search = parallel.ParallelSearch(game, workers=2)
+board = game.initial_state()
+for j in range(4):
+    board[7][4 + j] = mnk.X
+    board[9][2 * j + 1] = mnk.O
+assert search.minimax(board) in {(7, 3), (7, 8)}
+search.close()
+
+print(" - PASS")
+
+
+# BENCHMARK TESTS ==================================
+print("TEST - benchmark")
+print("test case 1", end="")
+
+assert benchmark.percentile([], 50) is None
+assert benchmark.percentile([3, 1, 2, 4], 50) == 2
+assert benchmark.percentile([3, 1, 2, 4], 99) == 4
+assert benchmark.percentile([5], 1) == 5
+
+print(" - PASS")
+
+print("test case 2", end="")
+
+# Perfect play never loses, and the counters see the search
+opening_book = ttt.opening_book
+report = benchmark.benchmark(games=10, book=False, clear=True, seed=0)
+assert ttt.opening_book is opening_book
+assert report["config"]["book"] is False
+
+ai = report["matches"]["ai-vs-ai"]
+assert ai["outcomes"] == {"X": 0, "O": 0, "tie": 10}
+assert ai["ai_moves"] == 90 and ai["nodes"] > 0
+assert ai["board_cache"]["hits"] > 0 and ai["transposition_table"]["hits"] > 0
+assert ai["latency_ms"]["p50"] <= ai["latency_ms"]["p99"] <= ai["latency_ms"]["max"]
+
+versus = report["matches"]["ai-vs-random"]
+assert versus["outcomes"]["random"] == 0
+assert versus["outcomes"]["ai"] + versus["outcomes"]["tie"] == 10
+
+print(" - PASS")
@@ -0,0 +1,90 @@
+"""
+Transposition table for Tic Tac Toe minimax
+"""
+
+from collections import OrderedDict
+
+# The 8 symmetries of the square, as functions of a cell (i, j)
+TRANSFORMS = (
+    lambda i, j: (i, j),
+    lambda i, j: (j, 2 - i),
+    lambda i, j: (2 - i, 2 - j),
+    lambda i, j: (2 - j, i),
+    lambda i, j: (i, 2 - j),
+    lambda i, j: (2 - i, j),
+    lambda i, j: (j, i),
+    lambda i, j: (2 - j, 2 - i),
+)
+
+# SYMMETRIES[s][k] is the original cell that symmetry s moves to cell k,
+# with cells numbered 3 * i + j
+SYMMETRIES = []
+for transform in TRANSFORMS:
+    permutation = [0] * 9
+    for i in range(3):
+        for j in range(3):
+            new_i, new_j = transform(i, j)
+            permutation[3 * new_i + new_j] = 3 * i + j
+    SYMMETRIES.append(tuple(permutation))
+
+# Base-3 digit of each cell value
+DIGITS = {None: 0, "X": 1, "O": 2}
+
+
+def canonical(board):
+    """
+    Returns the key of a board: the smallest base-3 encoding of the board
+    under any of its 8 symmetries.
+    """
+    cells = [DIGITS[cell] for row in board for cell in row]
+    best = None
+    for permutation in SYMMETRIES:
+        key = 0
+        for k in permutation:
+            key = key * 3 + cells[k]
+        if best is None or key < best:
+            best = key
+    return best
+
+
+class TranspositionTable():
+    """
+    Bounded map from canonical board keys to search results,
+    evicting the least recently used entry once `max_size` is reached.
+    A `max_size` of None means unbounded.
+    """
+
+    def __init__(self, max_size=None):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        """
+        Returns the entry for `key`, or None if it is not stored.
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, entry):
+        """
+        Stores an entry, evicting the least recently used one if full.
+        """
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        if self.max_size is not None and len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
@@ -1,3 +1,24 @@
+import argparse
+import heapq
+import json
+import math
+import random
+import sys
+import time
+from array import array
+from collections import deque
+
+# Search strategies accepted by Maze.solve
+STRATEGIES = ("dfs", "bfs", "ucs", "greedy", "astar", "jps")
+
+# Solvers compared by benchmark: the strategies, 8-connected jump point
+# search and the distance field, which needs NumPy
+SOLVERS = STRATEGIES + ("jps8", "field")
+
+# Maze generation algorithms accepted by generate
+GENERATORS = ("backtracker", "prim", "rooms")
+
+
 class Node:
     def __init__(self, state: tuple[int], parent=None, cost=None) -> None:
         self.state = state
@@ -23,17 +44,51 @@ class StackFrontier(list):
 
 
 class QueueFrontier(StackFrontier):
+    def __init__(self) -> None:
+        self.frontier = deque()
+
+    def remove(self) -> Node:
+        if self.isempty():
+            raise Exception("can't remove - frontier is empty!")
+
+        return self.frontier.popleft()
+
+
+class PriorityFrontier(StackFrontier):
+    """
+    Binary heap of nodes, removing the one with the lowest priority(node)
+    first. Ties go to the node added first.
+    """
+
+    def __init__(self, priority) -> None:
+        self.frontier = []
+        self.priority = priority
+        self.count = 0
+
+    def add(self, node: Node):
+        heapq.heappush(self.frontier, (self.priority(node), self.count, node))
+        self.count += 1
+
     def remove(self) -> Node:
         if self.isempty():
             raise Exception("can't remove - frontier is empty!")
 
-        first = self.frontier[0]
-        self.frontier = self.frontier[1:]
-        return first
+        return heapq.heappop(self.frontier)[2]
 
 
 class Maze:
-    def __init__(self, maze: str) -> None:
+    """
+    A maze parsed from text, where "S" is the start, "G" the goal, spaces
+    are open and anything else is a wall.
+
+    With compact=True, walls are kept in a flat bytearray `grid` indexed by
+    row * width + col instead of lists of bools, and solve works on integer
+    cell ids with arrays of parents rather than Node chains, so very large
+    mazes fit in a few bytes per cell. `visited` is then a bytearray marking
+    the explored cells.
+    """
+
+    def __init__(self, maze: str, compact: bool = False) -> None:
         # Check maze has start and goal
         if maze.count("S") != 1:
             raise Exception("maze must have exactly one start point")
@@ -48,6 +103,26 @@ class Maze:
         self.height = len(mazelines)
         self.width = len(mazelines[0])
 
+        self.compact = compact
+        if compact:
+            self.walls = None
+            self.grid = bytearray(self.width * self.height)
+            for i, line in enumerate(mazelines):
+                line = line[: self.width].ljust(self.width, "#")
+                self.grid[i * self.width : (i + 1) * self.width] = bytes(
+                    cell not in " SG" for cell in line
+                )
+                if "S" in line:
+                    self.start = (i, line.index("S"))
+                if "G" in line:
+                    self.goal = (i, line.index("G"))
+
+            self.solution = None
+            self.pathcost = None
+            self.visited = bytearray(len(self.grid))
+            self.distances = None
+            return
+
         # Keep track of walls
         self.walls: list[list[bool]] = []
         for i in range(self.height):
@@ -68,14 +143,28 @@ class Maze:
         self.solution = None
         self.pathcost = None
         self.visited = set()
+        self.distances = None
+
+    def iswall(self, i: int, j: int) -> bool:
+        if self.compact:
+            return self.grid[i * self.width + j] == 1
+        return self.walls[i][j]
+
+    def explored(self) -> int:
+        """
+        Number of cells explored by the last solve.
+        """
+        if self.compact:
+            return self.visited.count(1)
+        return len(self.visited)
 
     def print(self):
         prettymaze = []
 
-        for i, row in enumerate(self.walls):
+        for i in range(self.height):
             mapped = []
-            for j, col in enumerate(row):
-                if col:
+            for j in range(self.width):
+                if self.iswall(i, j):
                     mapped.append("█")
                 else:
                     if (i, j) == self.start:
@@ -97,7 +186,7 @@ class Maze:
         if self.pathcost is not None:
             print("Cost:", self.pathcost)
 
-        print("Total explored:", len(self.visited))
+        print("Total explored:", self.explored())
 
     def getneighbours(self, cell: Node):
         x, y = cell.state[0], cell.state[1]
@@ -119,8 +208,45 @@ class Maze:
 
         return neighbours
 
-    def solve(self) -> Node | None:
-        frontier = StackFrontier()
+    def heuristic(self, state: tuple[int]) -> int:
+        """
+        Manhattan distance from a cell to the goal.
+        """
+        return abs(state[0] - self.goal[0]) + abs(state[1] - self.goal[1])
+
+    def makefrontier(self, strategy: str) -> StackFrontier:
+        if strategy == "dfs":
+            return StackFrontier()
+        if strategy == "bfs":
+            return QueueFrontier()
+        if strategy == "ucs":
+            return PriorityFrontier(lambda node: node.cost)
+        if strategy == "greedy":
+            return PriorityFrontier(lambda node: self.heuristic(node.state))
+        if strategy == "astar":
+            # Among equal estimates, prefer the node closer to the goal
+            def priority(node):
+                h = self.heuristic(node.state)
+                return (node.cost + h, h)
+
+            return PriorityFrontier(priority)
+        raise Exception(f"unknown strategy {strategy!r}, expected one of {STRATEGIES}")
+
+    def solve(self, strategy: str = "dfs") -> Node | None:
+        """
+        Searches from start to goal with one of STRATEGIES: depth-first,
+        breadth-first, uniform-cost, greedy best-first, A* or jump point
+        search. All but dfs and greedy find a shortest path.
+        """
+        if strategy == "jps":
+            return self.solvejps()
+        if self.compact:
+            return self.solvecompact(strategy)
+
+        frontier = self.makefrontier(strategy)
+        self.solution = None
+        self.pathcost = None
+        self.visited = set()
 
         startnode = Node(state=self.start, cost=0)
         goalnode = None
@@ -129,6 +255,10 @@ class Maze:
         while frontier.isempty() == False:
             # Remove a node from the frontier
             current = frontier.remove()
+
+            # A cell can be added more than once before it is explored
+            if current.state in self.visited:
+                continue
             self.visited.add(current.state)
 
             # If the node is the goal, set solution found
@@ -151,6 +281,362 @@ class Maze:
             current = current.parent
         self.solution.reverse()
 
+    def solvecompact(self, strategy: str = "dfs") -> None:
+        """
+        solve for compact mazes. The frontier holds cell ids, and a cell's
+        parent and path cost are recorded when it is added, so no Node is
+        made per cell.
+        """
+        if strategy not in STRATEGIES:
+            raise Exception(f"unknown strategy {strategy!r}, expected one of {STRATEGIES}")
+
+        width, grid = self.width, self.grid
+        size = len(grid)
+        start = self.start[0] * width + self.start[1]
+        goal = self.goal[0] * width + self.goal[1]
+        goalrow, goalcol = self.goal
+
+        self.solution = None
+        self.pathcost = None
+        self.visited = visited = bytearray(size)
+        parents = array("i", [-1]) * size
+        costs = array("i", [-1]) * size
+        costs[start] = 0
+
+        # Heap entries are (priority, order added, cell); A* breaks ties on
+        # the distance left, as a priority of f * size + h
+        def priority(cell, cost):
+            h = abs(cell // width - goalrow) + abs(cell % width - goalcol)
+            if strategy == "ucs":
+                return cost
+            if strategy == "greedy":
+                return h
+            return (cost + h) * size + h
+
+        if strategy == "dfs":
+            frontier = [start]
+            remove = frontier.pop
+        elif strategy == "bfs":
+            frontier = deque([start])
+            remove = frontier.popleft
+        else:
+            frontier = [(priority(start, 0), 0, start)]
+            remove = lambda: heapq.heappop(frontier)[2]
+        count = 1
+
+        found = False
+        while frontier:
+            current = remove()
+
+            # A cell can be added more than once before it is explored
+            if visited[current]:
+                continue
+            visited[current] = 1
+
+            if current == goal:
+                found = True
+                break
+
+            cost = costs[current] + 1
+            col = current % width
+            for n in (
+                current - width if current >= width else -1,
+                current + width if current + width < size else -1,
+                current - 1 if col > 0 else -1,
+                current + 1 if col + 1 < width else -1,
+            ):
+                if n < 0 or grid[n] or visited[n]:
+                    continue
+
+                # Depth-first follows the latest path to a cell; the others
+                # keep the cheapest one found
+                if strategy != "dfs" and costs[n] != -1 and costs[n] <= cost:
+                    continue
+                parents[n] = current
+                costs[n] = cost
+                if strategy == "dfs" or strategy == "bfs":
+                    frontier.append(n)
+                else:
+                    heapq.heappush(frontier, (priority(n, cost), count, n))
+                    count += 1
+
+        if not found:
+            return
+
+        self.pathcost = costs[goal]
+        self.solution = []
+        while current != -1:
+            self.solution.append(divmod(current, width))
+            current = parents[current]
+        self.solution.reverse()
+
+    def solvejps(self, diagonal: bool = False) -> None:
+        """
+        Jump point search: A* over only the cells where a shortest path may
+        have to turn, found by scanning straight (and, with diagonal=True,
+        diagonal) lines from each one. Open areas are crossed in one jump
+        instead of cell by cell, and `visited` holds just the jump points
+        that were expanded.
+
+        With diagonal=True the search is 8-connected, moving diagonally
+        only between two open cells, and diagonal steps cost sqrt(2).
+        """
+        height, width, goal = self.height, self.width, self.goal
+        goalrow, goalcol = goal
+        if self.compact:
+            grid = self.grid
+        else:
+            grid = bytearray(wall for row in self.walls for wall in row)
+
+        # Columns laid out as rows, so vertical runs are scanned like rows
+        columns = None
+        if diagonal:
+            columns = bytearray(width * height)
+            for j in range(width):
+                columns[j * height : (j + 1) * height] = grid[j::width]
+
+        def free(i, j):
+            return 0 <= i < height and 0 <= j < width and not grid[i * width + j]
+
+        def scan(cells, length, count, line, k, step, target):
+            # Returns the first jump point along a straight run of `cells`,
+            # `count` lines of `length`, from position k of `line` stepping
+            # by `step`, or None if a wall comes first. `target` is the
+            # goal's position on the line, or -1. The run is searched for
+            # the next wall, and the lines either side for where a wall
+            # ends, rather than cell by cell
+            base = line * length
+            if step > 0:
+                wall = cells.find(1, base + k, base + length)
+                end = wall - base if wall >= 0 else length
+                found = target if k <= target < end else end
+                for side in (base - length, base + length):
+                    if 0 <= side < count * length:
+                        p = cells.find(b"\x01\x00", side + k - 1, side + found)
+                        if p >= 0:
+                            found = p + 1 - side
+                return found if found < end else None
+
+            wall = cells.rfind(1, base, base + k + 1)
+            end = wall - base if wall >= 0 else -1
+            found = target if end < target <= k else end
+            for side in (base - length, base + length):
+                if 0 <= side < count * length:
+                    p = cells.rfind(b"\x00\x01", side + found + 1, side + k + 2)
+                    if p >= 0:
+                        found = p - side
+            return found if found > end else None
+
+        def jump(i, j, di, dj):
+            # Returns the first jump point stepping from (i, j) in direction
+            # (di, dj), or None if a wall comes first
+            if not free(i, j):
+                return None
+            if not di:
+                k = scan(grid, width, height, i, j, dj, goalcol if i == goalrow else -1)
+                return None if k is None else (i, k)
+            if not dj and diagonal:
+                k = scan(columns, height, width, j, i, di, goalrow if j == goalcol else -1)
+                return None if k is None else (k, j)
+
+            if dj:
+                while True:
+                    if (i, j) == goal:
+                        return (i, j)
+                    if jump(i + di, j, di, 0) or jump(i, j + dj, 0, dj):
+                        return (i, j)
+                    if not (free(i + di, j) and free(i, j + dj)):
+                        return None
+                    i, j = i + di, j + dj
+                    if not free(i, j):
+                        return None
+
+            # Without diagonals, paths turn out of vertical runs, so each
+            # cell is checked for a forced turn and scanned across
+            left, right = j > 0, j + 1 < width
+            step = di * width
+            cell = i * width + j
+            while 0 <= i < height and not grid[cell]:
+                if i == goalrow and j == goalcol:
+                    return (i, j)
+                if (left and not grid[cell - 1] and grid[cell - step - 1]) or (
+                    right and not grid[cell + 1] and grid[cell - step + 1]
+                ):
+                    return (i, j)
+                target = goalcol if i == goalrow else -1
+                if right and not grid[cell + 1]:
+                    if scan(grid, width, height, i, j + 1, 1, target) is not None:
+                        return (i, j)
+                if left and not grid[cell - 1]:
+                    if scan(grid, width, height, i, j - 1, -1, target) is not None:
+                        return (i, j)
+                i += di
+                cell += step
+            return None
+
+        def directions(cell, parent):
+            # Directions worth jumping in from a jump point, given the one
+            # it was reached from
+            i, j = cell
+            if parent is None:
+                found = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+                if diagonal:
+                    found += [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+                return found
+
+            di = (i > parent[0]) - (i < parent[0])
+            dj = (j > parent[1]) - (j < parent[1])
+            if di and dj:
+                return [(di, 0), (0, dj), (di, dj)]
+            if not diagonal:
+                return [(di, dj), (dj, di), (-dj, -di)]
+            found = [(di, dj)]
+            for si, sj in ((dj, di), (-dj, -di)):
+                if free(i + si, j + sj):
+                    found += [(si, sj), (di + si, dj + sj)]
+            return found
+
+        def distance(a, b):
+            di, dj = abs(a[0] - b[0]), abs(a[1] - b[1])
+            if diagonal:
+                return abs(di - dj) + math.sqrt(2) * min(di, dj)
+            return di + dj
+
+        self.solution = None
+        self.pathcost = None
+        visited = set()
+
+        costs = {self.start: 0}
+        parents = {self.start: None}
+        frontier = [(distance(self.start, goal), 0, self.start)]
+        count = 1
+        found = False
+        while frontier:
+            _, _, current = heapq.heappop(frontier)
+
+            # A cell can be added more than once before it is explored
+            if current in visited:
+                continue
+            visited.add(current)
+
+            if current == goal:
+                found = True
+                break
+
+            for di, dj in directions(current, parents[current]):
+                if di and dj and not (
+                    free(current[0] + di, current[1]) and free(current[0], current[1] + dj)
+                ):
+                    continue
+                point = jump(current[0] + di, current[1] + dj, di, dj)
+                if point is None or point in visited:
+                    continue
+                cost = costs[current] + distance(current, point)
+                if point in costs and costs[point] <= cost:
+                    continue
+                costs[point] = cost
+                parents[point] = current
+                h = distance(point, goal)
+                heapq.heappush(frontier, ((cost + h, h), count, point))
+                count += 1
+
+        if self.compact:
+            self.visited = bytearray(len(self.grid))
+            for i, j in visited:
+                self.visited[i * width + j] = 1
+        else:
+            self.visited = visited
+
+        if not found:
+            return
+
+        # Fill in the straight runs between consecutive jump points
+        self.pathcost = costs[goal]
+        self.solution = [goal]
+        while parents[current] is not None:
+            parent = parents[current]
+            di = (parent[0] > current[0]) - (parent[0] < current[0])
+            dj = (parent[1] > current[1]) - (parent[1] < current[1])
+            while current != parent:
+                current = (current[0] + di, current[1] + dj)
+                self.solution.append(current)
+        self.solution.reverse()
+
+    def distancefield(self):
+        """
+        Computes and stores in `distances` the number of steps from every
+        cell to the goal, as a NumPy array with -1 for walls and cells that
+        cannot reach it.
+
+        The BFS wavefront grows one step at a time, with the frontier held
+        as an array of cell ids. The grid is padded with a border of walls,
+        so each step can offset the whole frontier by -width, +width, -1 and
+        +1 at once, drop walls and cells already reached, and dedupe the
+        rest with np.unique: every cell is handled once and no step touches
+        more than the frontier.
+        """
+        import numpy as np
+
+        if self.compact:
+            grid = np.frombuffer(self.grid, dtype=np.uint8).reshape(self.height, self.width)
+            passable = grid == 0
+        else:
+            passable = ~np.array(self.walls, dtype=bool)
+        passable = np.pad(passable, 1).ravel()
+
+        width = self.width + 2
+        offsets = np.array([-width, width, -1, 1])
+        goal = (self.goal[0] + 1) * width + self.goal[1] + 1
+        distances = np.full(passable.size, -1, dtype=np.int32)
+        distances[goal] = 0
+        frontier = np.array([goal])
+
+        distance = 0
+        while frontier.size:
+            distance += 1
+            neighbours = (frontier[:, None] + offsets).ravel()
+            neighbours = neighbours[passable[neighbours] & (distances[neighbours] < 0)]
+            frontier = np.unique(neighbours)
+            distances[frontier] = distance
+
+        distances = distances.reshape(self.height + 2, width)[1:-1, 1:-1]
+        self.distances = distances
+        return distances
+
+    def solvefield(self, start: tuple[int] = None) -> None:
+        """
+        Finds a shortest path from `start`, by default the maze's start, by
+        walking downhill through the distance field, which is computed on
+        first use. Later calls only cost the length of the path. Nothing is
+        explored, so `visited` is left empty.
+        """
+        if self.distances is None:
+            self.distancefield()
+        distances = self.distances
+
+        self.solution = None
+        self.pathcost = None
+        self.visited = bytearray(len(self.grid)) if self.compact else set()
+
+        i, j = self.start if start is None else start
+        distance = int(distances[i, j])
+        if distance < 0:
+            return
+
+        self.pathcost = distance
+        self.solution = [(i, j)]
+        while distance > 0:
+            distance -= 1
+            for ni, nj in ((i - 1, j), (i + 1, j), (i, j - 1), (i, j + 1)):
+                if (
+                    0 <= ni < self.height
+                    and 0 <= nj < self.width
+                    and distances[ni, nj] == distance
+                ):
+                    i, j = ni, nj
+                    break
+            self.solution.append((i, j))
+
 
 maze1 = """
  # # ###  #G
@@ -162,10 +648,6 @@ maze1 = """
 S   ##      
 """
 
-m = Maze(maze1)
-m.solve()
-m.print()
-
 maze2 = """
 ###                 #########
 #   ###################   # #
@@ -185,10 +667,6 @@ maze2 = """
 S      ######################
 """
 
-m = Maze(maze2)
-m.solve()
-m.print()
-
 maze3 = """
 ##    #
 ## ## #
@@ -198,6 +676,233 @@ maze3 = """
 S######
 """
 
-m = Maze(maze3)
-m.solve()
-m.print()
+
+def load(path: str, compact: bool = False) -> Maze:
+    """
+    Reads a maze from a text file.
+    """
+    with open(path) as f:
+        text = f.read()
+
+    # Maze skips the first line, which is blank in the literals below
+    return Maze("\n" + text, compact=compact)
+
+
+def generate(height: int, width: int, algorithm: str = "backtracker", seed=None) -> str:
+    """
+    Returns the text of a random height x width maze, with the start in
+    the top left and the goal in the bottom right.
+
+    backtracker and prim carve a perfect maze (one path between any two
+    cells) through the cells at odd coordinates, by a randomised
+    depth-first search or Prim's algorithm. rooms splits an open area into
+    rooms joined by doorways.
+    """
+    if algorithm not in GENERATORS:
+        raise Exception(f"unknown algorithm {algorithm!r}, expected one of {GENERATORS}")
+    if height < 3 or width < 3:
+        raise Exception("maze must be at least 3x3")
+
+    rng = random.Random(seed)
+    grid = bytearray([1]) * (height * width)
+
+    # Bottom right open cell; the last row and column stay walls when even
+    last = (height - 2 if height % 2 else height - 3) * width + (
+        width - 2 if width % 2 else width - 3
+    )
+
+    if algorithm == "rooms":
+        room = max(4, min(height, width) // 8)
+        for i in range(1, height - 1):
+            grid[i * width + 1 : (i + 1) * width - 1] = bytes(width - 2)
+
+        # Walls every `room` cells, each stretch between crossings with a
+        # doorway
+        for i in range(room, height - 1, room):
+            for j in range(1, width - 1):
+                grid[i * width + j] = 1
+            for j in range(1, width - 1, room):
+                grid[i * width + rng.randrange(j, min(j + room - 1, width - 1))] = 0
+        for j in range(room, width - 1, room):
+            for i in range(1, height - 1):
+                grid[i * width + j] = 1
+            for i in range(1, height - 1, room):
+                grid[rng.randrange(i, min(i + room - 1, height - 1)) * width + j] = 0
+
+        # Keep the goal off the wall lines, inside the bottom right room
+        goalrow, goalcol = height - 2, width - 2
+        if goalrow % room == 0:
+            goalrow -= 1
+        if goalcol % room == 0:
+            goalcol -= 1
+        last = goalrow * width + goalcol
+    else:
+        # Moves between cells two apart, knocking down the wall between
+        def cells(cell):
+            i, j = divmod(cell, width)
+            if i > 2:
+                yield cell - 2 * width
+            if i + 2 < height - 1:
+                yield cell + 2 * width
+            if j > 2:
+                yield cell - 2
+            if j + 2 < width - 1:
+                yield cell + 2
+
+        first = width + 1
+        grid[first] = 0
+        if algorithm == "backtracker":
+            stack = [first]
+            while stack:
+                cell = stack[-1]
+                options = [n for n in cells(cell) if grid[n]]
+                if not options:
+                    stack.pop()
+                    continue
+                n = rng.choice(options)
+                grid[(cell + n) // 2] = 0
+                grid[n] = 0
+                stack.append(n)
+        else:
+            frontier = [(first, n) for n in cells(first)]
+            while frontier:
+                k = rng.randrange(len(frontier))
+                frontier[k], frontier[-1] = frontier[-1], frontier[k]
+                cell, n = frontier.pop()
+                if not grid[n]:
+                    continue
+                grid[(cell + n) // 2] = 0
+                grid[n] = 0
+                frontier.extend((n, m) for m in cells(n) if grid[m])
+
+    if last == width + 1:
+        raise Exception(f"a {height}x{width} maze has no room for both a start and a goal")
+    grid[width + 1] = ord("S")
+    grid[last] = ord("G")
+    text = grid.translate(bytes.maketrans(b"\x00\x01", b" #")).decode("ascii")
+    return "\n".join(text[i * width : (i + 1) * width] for i in range(height))
+
+
+def solver(name: str):
+    """
+    Returns a function that solves a Maze with one of SOLVERS.
+    """
+    if name in STRATEGIES:
+        return lambda maze: maze.solve(name)
+    if name == "jps8":
+        return lambda maze: maze.solvejps(diagonal=True)
+    if name == "field":
+        return lambda maze: maze.solvefield()
+    raise Exception(f"unknown solver {name!r}, expected one of {SOLVERS}")
+
+
+def benchmark(mazes: dict, solvers=SOLVERS, compact: bool = True) -> list[dict]:
+    """
+    Solves every maze in `mazes`, a dictionary from names to maze text,
+    with each of `solvers` on a freshly loaded Maze. Returns a row per run
+    with its wall time, explored cells and path cost.
+    """
+    rows = []
+    for name, text in mazes.items():
+        for solvername in solvers:
+            solve = solver(solvername)
+            maze = Maze("\n" + text, compact=compact)
+            start = time.perf_counter()
+            solve(maze)
+            seconds = time.perf_counter() - start
+            rows.append(
+                {
+                    "maze": name,
+                    "size": f"{maze.height}x{maze.width}",
+                    "solver": solvername,
+                    "seconds": seconds,
+                    "explored": maze.explored(),
+                    "pathcost": maze.pathcost,
+                }
+            )
+    return rows
+
+
+def demo():
+    for text in (maze1, maze2, maze3):
+        m = Maze(text)
+        m.solve()
+        m.print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve, generate and benchmark mazes.")
+    commands = parser.add_subparsers(dest="command")
+
+    solve = commands.add_parser("solve", help="solve a maze file")
+    solve.add_argument("file")
+    solve.add_argument("--solver", choices=SOLVERS, default="dfs")
+    solve.add_argument("--compact", action="store_true")
+    solve.add_argument("--quiet", action="store_true", help="only print cost and explored cells")
+
+    make = commands.add_parser("generate", help="generate a random maze")
+    make.add_argument("height", type=int)
+    make.add_argument("width", type=int)
+    make.add_argument("--algorithm", choices=GENERATORS, default="backtracker")
+    make.add_argument("--seed", type=int)
+    make.add_argument("--output", help="write the maze here instead of stdout")
+
+    bench = commands.add_parser("bench", help="compare solvers on maze files or generated mazes")
+    bench.add_argument("files", nargs="*")
+    bench.add_argument(
+        "--size",
+        type=int,
+        action="append",
+        default=[],
+        help="also generate SIZE x SIZE mazes with every algorithm",
+    )
+    bench.add_argument("--seed", type=int, default=0)
+    bench.add_argument("--solver", choices=SOLVERS, action="append", help="default: all")
+    bench.add_argument("--nodes", action="store_true", help="use Node-based mazes, not compact")
+    bench.add_argument("--json", action="store_true", help="print the results as JSON")
+
+    args = parser.parse_args()
+
+    if args.command == "solve":
+        m = load(args.file, compact=args.compact)
+        solver(args.solver)(m)
+        if args.quiet:
+            print("Cost:", m.pathcost)
+            print("Total explored:", m.explored())
+        else:
+            m.print()
+    elif args.command == "generate":
+        text = generate(args.height, args.width, args.algorithm, args.seed)
+        if args.output:
+            with open(args.output, "w") as f:
+                f.write(text + "\n")
+        else:
+            print(text)
+    elif args.command == "bench":
+        mazes = {}
+        for path in args.files:
+            with open(path) as f:
+                mazes[path] = f.read()
+        for size in args.size:
+            for algorithm in GENERATORS:
+                mazes[f"{algorithm}-{size}"] = generate(size, size, algorithm, args.seed)
+        if not mazes:
+            sys.exit("Nothing to benchmark: give maze files or --size.")
+
+        rows = benchmark(mazes, args.solver or SOLVERS, compact=not args.nodes)
+        if args.json:
+            print(json.dumps(rows, indent=2))
+        else:
+            print(f"{'maze':<24} {'size':>11} {'solver':<7} {'seconds':>9} {'explored':>9} {'cost':>9}")
+            for row in rows:
+                cost = "-" if row["pathcost"] is None else f"{row['pathcost']:g}"
+                print(
+                    f"{row['maze']:<24} {row['size']:>11} {row['solver']:<7} "
+                    f"{row['seconds']:>9.3f} {row['explored']:>9} {cost:>9}"
+                )
+    else:
+        demo()
+
+
+if __name__ == "__main__":
+    main()
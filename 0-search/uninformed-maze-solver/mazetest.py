@@ -0,0 +1,239 @@
+import math
+import os
+import random
+import tempfile
+import time
+
+import maze
+
+
+def path_ok(m, diagonal=False):
+    # The solution runs from start to goal through open cells, one step at a
+    # time
+    solution = m.solution
+    if solution[0] != m.start or solution[-1] != m.goal:
+        return False
+    for (i, j), (ni, nj) in zip(solution, solution[1:]):
+        di, dj = abs(ni - i), abs(nj - j)
+        if m.iswall(ni, nj) or max(di, dj) != 1 or (not diagonal and di + dj != 1):
+            return False
+    return True
+
+
+def random_maze(height, width, density):
+    # Text of a random maze, with the start and goal on two different cells
+    cells = [["#" if random.random() < density else " " for _ in range(width)] for _ in range(height)]
+    (si, sj), (gi, gj) = random.sample([(i, j) for i in range(height) for j in range(width)], 2)
+    cells[si][sj], cells[gi][gj] = "S", "G"
+    return "\n" + "\n".join("".join(row) for row in cells)
+
+
+def open_maze(size):
+    # Text of a size x size maze with no walls, start and goal in opposite
+    # corners
+    rows = [" " * size for _ in range(size)]
+    rows[0] = "S" + rows[0][1:]
+    rows[-1] = rows[-1][:-1] + "G"
+    return "\n" + "\n".join(rows)
+
+
+random.seed(0)
+generated = {
+    algorithm: maze.generate(41, 61, algorithm, seed=1) for algorithm in maze.GENERATORS
+}
+mazes = [maze.maze1, maze.maze2, maze.maze3] + list(generated.values()) + [
+    random_maze(random.randint(2, 20), random.randint(2, 20), 0.3) for _ in range(50)
+]
+
+
+# STRATEGY TESTS ==================================
+print("TEST - search strategies")
+print("test case 1", end="")
+
+for text in mazes:
+    shortest = maze.Maze(text)
+    shortest.solve("bfs")
+    for strategy in maze.STRATEGIES:
+        m = maze.Maze(text)
+        m.solve(strategy)
+        if shortest.solution is None:
+            assert m.solution is None and m.pathcost is None
+            continue
+        assert path_ok(m) and m.pathcost == len(m.solution) - 1
+        if strategy in ("bfs", "ucs", "astar", "jps"):
+            assert m.pathcost == shortest.pathcost
+
+print(" - PASS")
+
+print("test case 2", end="")
+
+# Informed search explores less of an open grid than breadth-first search
+m = maze.Maze(open_maze(30))
+counts = {}
+for strategy in ("bfs", "astar", "jps"):
+    m.solve(strategy)
+    assert m.pathcost == 58
+    counts[strategy] = m.explored()
+assert counts["jps"] < counts["astar"] < counts["bfs"]
+
+try:
+    m.solve("nope")
+    assert False
+except Exception as e:
+    assert "unknown strategy" in str(e)
+
+print(" - PASS")
+
+
+# COMPACT GRID TESTS ==================================
+print("TEST - compact grid")
+print("test case 1", end="")
+
+# The compact solver finds the same paths as the Node-based one
+for text in mazes:
+    for strategy in maze.STRATEGIES:
+        m = maze.Maze(text)
+        m.solve(strategy)
+        c = maze.Maze(text, compact=True)
+        c.solve(strategy)
+        assert c.solution == m.solution
+        assert c.pathcost == m.pathcost and c.explored() == m.explored()
+
+print(" - PASS")
+
+
+# DISTANCE FIELD TESTS ==================================
+print("TEST - distance field")
+print("test case 1", end="")
+
+for text in mazes:
+    shortest = maze.Maze(text)
+    shortest.solve("bfs")
+    for compact in (False, True):
+        field = maze.Maze(text, compact=compact)
+        field.solvefield()
+        assert field.pathcost == shortest.pathcost
+        assert field.solution is None or path_ok(field)
+
+print(" - PASS")
+
+print("test case 2", end="")
+
+# Every open cell's distance matches a breadth-first search from it
+m = maze.Maze(maze.maze2)
+m.distancefield()
+for i in range(m.height):
+    for j in range(m.width):
+        if m.iswall(i, j):
+            assert m.distances[i, j] == -1
+            continue
+        m.solvefield((i, j))
+        assert m.solution[0] == (i, j) and m.solution[-1] == m.goal
+        assert m.pathcost == len(m.solution) - 1 == m.distances[i, j]
+
+print(" - PASS")
+
+
+# JUMP POINT SEARCH TESTS ==================================
+print("TEST - jump point search")
+print("test case 1", end="")
+
+for text in mazes:
+    shortest = maze.Maze(text)
+    shortest.solve("bfs")
+    for compact in (False, True):
+        m = maze.Maze(text, compact=compact)
+        m.solve("jps")
+        assert m.pathcost == shortest.pathcost
+        assert m.solution is None or path_ok(m)
+
+        m.solvejps(diagonal=True)
+        assert (m.solution is None) == (shortest.solution is None)
+        if m.solution is not None:
+            assert path_ok(m, diagonal=True) and m.pathcost <= shortest.pathcost
+
+print(" - PASS")
+
+print("test case 2", end="")
+
+# A large open grid is crossed in a few jumps, scanning rows rather than cells
+lines = [" " * 1000 for _ in range(1000)]
+lines[0] = "S" + lines[0][1:]
+lines[-1] = lines[-1][:-1] + "G"
+for compact in (False, True):
+    for diagonal in (False, True):
+        m = maze.Maze("\n" + "\n".join(lines), compact=compact)
+        start = time.perf_counter()
+        m.solvejps(diagonal=diagonal)
+        assert time.perf_counter() - start < 0.5
+        assert m.explored() <= 3 and path_ok(m, diagonal=diagonal)
+        assert m.pathcost == (999 * math.sqrt(2) if diagonal else 1998)
+
+print(" - PASS")
+
+
+# GENERATOR TESTS ==================================
+print("TEST - generators")
+print("test case 1", end="")
+
+for algorithm, text in generated.items():
+    lines = text.splitlines()
+    assert len(lines) == 41 and all(len(line) == 61 for line in lines)
+    assert text.count("S") == 1 and text.count("G") == 1
+    assert maze.generate(41, 61, algorithm, seed=1) == text
+    assert maze.generate(41, 61, algorithm, seed=2) != text
+
+    m = maze.Maze("\n" + text)
+    m.solve("bfs")
+    assert m.solution is not None
+
+# Perfect mazes have exactly one path, so even depth-first finds it
+m = maze.Maze("\n" + generated["backtracker"])
+m.solve("dfs")
+dfs_cost = m.pathcost
+m.solve("bfs")
+assert m.pathcost == dfs_cost
+
+assert maze.generate(10, 10, seed=3).count("\n") == 9
+
+print(" - PASS")
+
+print("test case 2", end="")
+
+# Every size and seed gives a solvable maze, including rooms whose goal
+# corner falls where wall lines cross
+for algorithm in maze.GENERATORS:
+    for height, width in ((5, 3), (3, 5), (4, 5), (10, 10), (12, 21), (26, 26), (202, 202)):
+        for seed in range(20 if height < 100 else 2):
+            m = maze.Maze("\n" + maze.generate(height, width, algorithm, seed), compact=True)
+            m.solve("astar")
+            assert m.solution is not None
+
+for algorithm in maze.GENERATORS:
+    for height, width in ((3, 3), (4, 3), (3, 4), (4, 4)):
+        if algorithm == "rooms" and (height - 2) * (width - 2) > 1:
+            continue
+        try:
+            maze.generate(height, width, algorithm)
+            assert False
+        except Exception as e:
+            assert "no room" in str(e)
+
+print(" - PASS")
+
+print("test case 3", end="")
+
+with tempfile.TemporaryDirectory() as directory:
+    path = os.path.join(directory, "maze.txt")
+    with open(path, "w") as f:
+        f.write(generated["prim"] + "\n")
+    loaded = maze.load(path, compact=True)
+    assert (loaded.height, loaded.width) == (41, 61)
+    assert loaded.start == (1, 1) and loaded.goal == (39, 59)
+
+rows = maze.benchmark({"rooms": generated["rooms"]}, solvers=("bfs", "jps", "field"))
+assert [row["solver"] for row in rows] == ["bfs", "jps", "field"]
+assert len({row["pathcost"] for row in rows}) == 1
+assert all(row["size"] == "41x61" and row["seconds"] >= 0 for row in rows)
+
+print(" - PASS")